@@ -1,26 +1,59 @@
 # Student Schedule Reminder Group 1
-import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox
-import csv
 from tkinter import filedialog
 import datetime
-from pathlib import Path
-
-# USER ACCOUNT
-DEFAULT_USERS = {
-    "student": {"password": "1234", "fullname": "Student User", "role": "student"},
-    "admin": {"password": "admin123", "fullname": "Administrator", "role": "admin"},
-    "instructor": {"password": "teach123", "fullname": "Instructor", "role": "instructor"}
-}
+import heapq
+import os
+import queue
+import threading
+import time
+
+import schedule_client
+import schedule_csv
+import schedule_db as db
+import schedule_metrics as metrics
+import schedule_worker
+from schedule_worker import DbWorker
 
 MANAGER_ROLES = {"admin", "instructor"}
 TERM_OPTIONS = ("Prelim", "Midterm", "Prefinals", "Finals")
 
-users = {}
+REMINDER_STAGES = db.REMINDER_STAGES
+REMINDER_MAX_WAIT_MS = 3600000
+TASK_SYNC_INTERVAL_MS = 5000
+VIRTUAL_TABLE_THRESHOLD = 5000
+TABLE_PAGE_SIZE = 100
+TABLE_WINDOW_ROWS = 300
+SEARCH_DEBOUNCE_MS = 40
+DIGEST_RENDER_MS = 500
+METRICS_PANEL_MS = 1000
+METRICS_FILE_INTERVAL_MS = 60000
+SNOOZE_SECONDS = 3600
+STUDENT_LOOKUP_LIMIT = 50
+# recurring tasks are only expanded for deadlines in this range around today
+OCCURRENCE_PAST_DAYS = 14
+OCCURRENCE_AHEAD_DAYS = 42
+# how long a repeat without an end date runs
+SEMESTER_WEEKS = 16
+# the archive dialog's default for "completed tasks due more than N days ago"
+ARCHIVE_COMPLETED_DAYS = 30
+# (label, days between occurrences); 0 adds a single task
+REPEAT_OPTIONS = (
+    ("Does not repeat", 0),
+    ("Daily", 1),
+    ("Weekly", 7),
+    ("Every 2 weeks", 14),
+    ("Every 3 weeks", 21),
+    ("Every 4 weeks", 28),
+)
+# reminder digest groups, most urgent first: (REMINDER_STAGES index, heading)
+DIGEST_GROUPS = ((2, "Overdue"), (1, "Due now"), (0, "Due within 3 hours"))
+
 current_user = None
+# loaded rows as db.TaskRecord, in table order, plus the same records by id
 tasks = []
-DB_PATH = Path(__file__).with_name("schedule.db")
+task_index = {}
 
 # ---------------------------------------------
 # THEME COLORS
@@ -38,85 +71,9 @@ DASH_BG = "#eeeeee"
 # ---------------------------------------------
 # DATABASE HELPERS
 # ---------------------------------------------
-def ensure_table_columns(cursor, table_name, columns):
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    existing = {row[1] for row in cursor.fetchall()}
-    for column_name, definition in columns.items():
-        if column_name not in existing:
-            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {definition}")
-
-
-def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                username TEXT PRIMARY KEY,
-                password TEXT NOT NULL,
-                fullname TEXT NOT NULL,
-                role TEXT NOT NULL DEFAULT 'student'
-            )
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                section TEXT NOT NULL,
-                course TEXT NOT NULL,
-                year_level TEXT NOT NULL,
-                instructor TEXT NOT NULL,
-                term TEXT NOT NULL,
-                deadline TEXT NOT NULL,
-                status TEXT NOT NULL
-            )
-            """
-        )
-
-        ensure_table_columns(cursor, "users", {
-            "role": "role TEXT NOT NULL DEFAULT 'student'"
-        })
-
-        ensure_table_columns(cursor, "tasks", {
-            "section": "section TEXT NOT NULL DEFAULT ''",
-            "course": "course TEXT NOT NULL DEFAULT ''",
-            "year_level": "year_level TEXT NOT NULL DEFAULT ''",
-            "instructor": "instructor TEXT NOT NULL DEFAULT ''",
-            "term": "term TEXT NOT NULL DEFAULT 'Prelim'"
-        })
-
-        for username, info in DEFAULT_USERS.items():
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO users (username, password, fullname, role)
-                VALUES (?, ?, ?, ?)
-                """,
-                (username, info["password"], info["fullname"], info["role"])
-            )
-            cursor.execute(
-                "UPDATE users SET role = ? WHERE username = ?",
-                (info["role"], username)
-            )
-        conn.commit()
-
-
-def load_users():
-    global users
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT username, password, fullname, role FROM users")
-        rows = cursor.fetchall()
-    users = {
-        row[0]: {
-            "password": row[1],
-            "fullname": row[2],
-            "role": row[3] if row[3] else "student"
-        }
-        for row in rows
-    }
+def index_tasks():
+    task_index.clear()
+    task_index.update((task["id"], task) for task in tasks)
 
 # ---------------------------------------------
 # BUTTON HOVER
@@ -130,14 +87,13 @@ def hover_out(event):
 # ---------------------------------------------
 # UPDATE DASHBOARD
 # ---------------------------------------------
-def update_dashboard():
-    total = len(tasks)
-    pending = len([t for t in tasks if t["status"] == "Pending"])
-    completed = len([t for t in tasks if t["status"] == "Completed"])
+def update_dashboard(counts):
+    total, pending, completed = counts
 
-    total_label.config(text=f"Total Tasks: {total}")
-    pending_label.config(text=f"Pending: {pending}")
-    completed_label.config(text=f"Completed: {completed}")
+    with metrics.timer("tk update_dashboard"):
+        total_label.config(text=f"Total Tasks: {total}")
+        pending_label.config(text=f"Pending: {pending}")
+        completed_label.config(text=f"Completed: {completed}")
 
 # ---------------------------------------------
 # LOGIN WINDOW
@@ -162,14 +118,30 @@ def open_login_window():
     password_entry = tk.Entry(container, width=28, font=("Segoe UI", 12), show="*")
     password_entry.pack(pady=3)
 
+    def show_login_error(exc):
+        login_btn.configure(state="normal")
+        messagebox.showerror("Database Error", f"A database operation failed:\n{exc}")
+
+    # password hashing takes a noticeable moment, so it runs off the Tk thread too
+    worker = DbWorker(login, on_error=show_login_error)
+    login.bind("<Destroy>", lambda event: worker.stop() if event.widget is login else None, add="+")
+
     def login_user():
-        global current_user
         username = username_entry.get()
         password = password_entry.get()
+        if not username or not password:
+            messagebox.showerror("Error", "Invalid username or password.")
+            return
+        login_btn.configure(state="disabled")
+        worker.submit(db.authenticate, username, password,
+                      on_done=lambda user: logged_in(username, user))
 
-        if username in users and users[username]["password"] == password:
+    def logged_in(username, user):
+        global current_user
+        login_btn.configure(state="normal")
+        if user is not None:
             current_user = username
-            messagebox.showinfo("Success", f"Welcome {users[username]['fullname']}!")
+            messagebox.showinfo("Success", f"Welcome {user['fullname']}!")
             login.destroy()
             open_main_window()
         else:
@@ -202,15 +174,19 @@ def open_main_window():
     window.title("Schedule Reminder")
     window.attributes("-fullscreen", True)
     window.configure(bg=BG)
-    current_role = users[current_user].get("role", "student")
+    profile = db.fetch_user(current_user)
+    current_role = profile["role"]
     can_manage = current_role in MANAGER_ROLES
+    # students only ever load, count and get reminded about tasks for the
+    # sections they are enrolled in
+    scope_user = None if can_manage else current_user
 
     # ------------------ PROFILE BAR ------------------
     topbar = tk.Frame(window, bg=CARD_BG, height=60)
     topbar.pack(fill="x")
 
     tk.Label(topbar,
-             text=f"Logged in as: {users[current_user]['fullname']} ({current_role.title()})",
+             text=f"Logged in as: {profile['fullname']} ({current_role.title()})",
              font=("Segoe UI", 12), bg=CARD_BG).pack(side="right", padx=20)
 
     def logout():
@@ -221,6 +197,18 @@ def open_main_window():
               width=10, font=("Segoe UI", 11), command=logout,
               relief="flat", bd=0).pack(side="right", padx=10, pady=10)
 
+    busy_label = tk.Label(topbar, text="", font=("Segoe UI", 10, "italic"), bg=CARD_BG, fg="#555")
+    busy_label.pack(side="left", padx=20)
+
+    def show_busy(pending):
+        busy_label.config(text=f"Working... ({pending} pending)" if pending else "")
+
+    def show_db_error(exc):
+        messagebox.showerror("Database Error", f"A database operation failed:\n{exc}")
+
+    # every SQLite call below goes through this worker; callbacks run on the Tk thread
+    worker = DbWorker(window, on_error=show_db_error, on_busy=show_busy)
+
     content_container = tk.Frame(window, bg=BG)
     content_container.pack(fill="both", expand=True)
 
@@ -290,6 +278,43 @@ def open_main_window():
     pending_label.pack()
     completed_label.pack()
 
+    breakdown_frame = tk.Frame(center, bg=BG)
+    breakdown_frame.pack(pady=(20, 0))
+
+    tk.Label(breakdown_frame, text="Breakdown by:", bg=BG,
+             font=("Segoe UI", 12)).grid(row=0, column=0, padx=10, sticky="w")
+    breakdown_var = tk.StringVar(value=db.SUMMARY_DIMENSIONS[0].title())
+    breakdown_combo = ttk.Combobox(breakdown_frame, width=15, font=("Segoe UI", 12), state="readonly",
+                                   textvariable=breakdown_var,
+                                   values=[dimension.title() for dimension in db.SUMMARY_DIMENSIONS])
+    breakdown_combo.grid(row=0, column=1, sticky="w")
+    breakdown_combo.bind("<<ComboboxSelected>>", lambda _event: refresh_dashboard())
+
+    breakdown_columns = ("Group", "Total", "Pending", "Completed")
+    breakdown_list = ttk.Treeview(breakdown_frame, columns=breakdown_columns, show="headings", height=5)
+    for col in breakdown_columns:
+        breakdown_list.heading(col, text=col)
+        breakdown_list.column(col, width=200 if col == "Group" else 120, anchor="center")
+    breakdown_list.grid(row=1, column=0, columnspan=2, pady=10)
+
+    # ------------------ REMINDER DIGEST ------------------
+    digest_frame = tk.Frame(center, bg=BG)
+    digest_frame.pack(pady=(10, 0))
+
+    digest_summary = tk.Label(digest_frame, text="Reminders: nothing due", bg=BG,
+                              font=("Segoe UI", 12, "bold"))
+    digest_summary.grid(row=0, column=0, sticky="w", padx=10)
+    digest_list = ttk.Treeview(digest_frame, columns=("Task", "Subject", "Deadline"),
+                               show="tree headings", height=6)
+    digest_list.heading("#0", text="When")
+    digest_list.column("#0", width=200)
+    for col in ("Task", "Subject", "Deadline"):
+        digest_list.heading(col, text=col)
+        digest_list.column(col, width=180, anchor="center")
+    for stage, heading in DIGEST_GROUPS:
+        digest_list.insert("", "end", iid=f"group-{stage}", text=f"{heading} (0)", open=True)
+    digest_list.grid(row=1, column=0, columnspan=4, pady=5)
+
     # ------------------ INPUT AREA ------------------
     input_frame = tk.Frame(center, bg=BG)
     input_frame.pack(pady=20)
@@ -307,6 +332,8 @@ def open_main_window():
     label(6, "Term (Prelim/Midterm):")
     label(7, "Due Date (YYYY-MM-DD):")
     label(8, "Deadline (hh:mm AM/PM):")
+    label(9, "Repeat:")
+    label(10, "Repeat until (YYYY-MM-DD):")
 
     task_name_entry = tk.Entry(input_frame, width=40, font=("Segoe UI", 12))
     subject_entry = tk.Entry(input_frame, width=40, font=("Segoe UI", 12))
@@ -319,6 +346,10 @@ def open_main_window():
                               textvariable=term_var, state="readonly", values=TERM_OPTIONS)
     date_entry = tk.Entry(input_frame, width=40, font=("Segoe UI", 12))
     time_entry = tk.Entry(input_frame, width=40, font=("Segoe UI", 12))
+    repeat_var = tk.StringVar(value=REPEAT_OPTIONS[0][0])
+    repeat_combo = ttk.Combobox(input_frame, width=37, font=("Segoe UI", 12), textvariable=repeat_var,
+                                state="readonly", values=[option[0] for option in REPEAT_OPTIONS])
+    until_entry = tk.Entry(input_frame, width=40, font=("Segoe UI", 12))
 
     task_name_entry.grid(row=0, column=1)
     subject_entry.grid(row=1, column=1)
@@ -329,67 +360,438 @@ def open_main_window():
     term_combo.grid(row=6, column=1)
     date_entry.grid(row=7, column=1)
     time_entry.grid(row=8, column=1)
+    repeat_combo.grid(row=9, column=1)
+    until_entry.grid(row=10, column=1)
+
+    def task_row_values(task):
+        return (
+            task["name"],
+            task["subject"],
+            task["section"],
+            task["course"],
+            task["year_level"],
+            task["instructor"],
+            task["term"],
+            task["deadline"],
+            task["status"],
+        )
 
     def refresh_task_table():
-        task_list.delete(*task_list.get_children())
-        for task in tasks:
-            task_list.insert(
-                "",
-                "end",
-                iid=str(task["id"]),
-                values=(
-                    task["name"],
-                    task["subject"],
-                    task["section"],
-                    task["course"],
-                    task["year_level"],
-                    task["instructor"],
-                    task["term"],
-                    task["deadline"],
-                    task["status"],
-                )
-            )
-        update_dashboard()
-
-    def load_tasks_from_db(refresh_ui=True):
-        tasks.clear()
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, name, subject, section, course, year_level, instructor, term, deadline, status
-                FROM tasks
-                ORDER BY id
-                """
+        # full rebuild, only used when the whole list was (re)loaded
+        with metrics.timer("tk refresh_task_table"):
+            task_list.delete(*task_list.get_children())
+            for task in tasks:
+                task_list.insert("", "end", iid=str(task["id"]), values=task_row_values(task))
+        metrics.count("tk items inserted", len(tasks))
+        refresh_dashboard()
+
+    dashboard_pending = False
+    dashboard_stale = False
+
+    def occurrence_window():
+        # (start_ts, end_ts) in which recurring tasks are expanded
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        return (int((today - datetime.timedelta(days=OCCURRENCE_PAST_DAYS)).timestamp()),
+                int((today + datetime.timedelta(days=OCCURRENCE_AHEAD_DAYS)).timestamp()))
+
+    def read_dashboard(dimension):
+        # counts come from the trigger-maintained task_summary table, so they
+        # stay O(1) and correct even when only a window of rows is loaded;
+        # only the recurring occurrences in occurrence_window() are counted
+        span = occurrence_window()
+        return db.count_tasks(scope_user, span), db.fetch_task_summary(dimension, scope_user, span)
+
+    def refresh_dashboard():
+        nonlocal dashboard_pending, dashboard_stale
+        # coalesce bursts of changes into one read; a request made while a read
+        # is queued triggers exactly one more read afterwards
+        if dashboard_pending:
+            dashboard_stale = True
+            return
+        dashboard_pending = True
+        dashboard_stale = False
+        worker.submit(read_dashboard, breakdown_var.get().lower(), on_done=show_dashboard)
+
+    def show_dashboard(result):
+        nonlocal dashboard_pending
+        dashboard_pending = False
+        counts, groups = result
+        update_dashboard(counts)
+        breakdown_list.delete(*breakdown_list.get_children())
+        for value, total, pending, completed in groups:
+            breakdown_list.insert("", "end", values=(value or "-", total, pending, completed))
+        if dashboard_stale:
+            refresh_dashboard()
+
+    task_sync_seq = 0
+    task_sync_version = None
+    task_sync_timer = None
+
+    # ------------------ VIRTUAL TABLE ------------------
+    # with more than VIRTUAL_TABLE_THRESHOLD rows, `tasks` holds only a window of
+    # at most TABLE_WINDOW_ROWS rows ordered by (deadline_ts, id); pages are
+    # pulled from SQLite as the table is scrolled towards either edge
+    virtual_table = False
+    rows_before = False
+    rows_after = False
+    page_pending = False
+
+    def table_sort_key(task):
+        if virtual_table:
+            return (task["deadline_ts"] is not None, task["deadline_ts"] or 0, task["id"])
+        # recurring occurrences (negative ids) after the stored tasks
+        return (task["id"] < 0, abs(task["id"]))
+
+    def page_key(task):
+        return (task["deadline_ts"], task["id"])
+
+    def apply_task_changes(changed=(), deleted=()):
+        # patch `tasks` and the Treeview in place: edited rows get item(), rows
+        # whose sort position changed are detached and re-inserted, and rows
+        # that left the list (or the virtual window) are deleted
+        if search_active:
+            apply_search_changes(changed, deleted)
+            return
+        low = table_sort_key(tasks[0]) if tasks and rows_before else None
+        high = table_sort_key(tasks[-1]) if tasks and rows_after else None
+        current = dict(task_index)
+        before_ids = set(current)
+        deleted = set(deleted)
+        moved = set()
+        for task_id in deleted:
+            current.pop(task_id, None)
+        for task in changed:
+            existing = current.get(task["id"])
+            if existing is None:
+                current[task["id"]] = task.copy()
+                moved.add(task["id"])
+            else:
+                old_key = table_sort_key(existing)
+                existing.update(task)
+                if table_sort_key(existing) != old_key:
+                    moved.add(task["id"])
+
+        if moved or deleted & before_ids:
+            ordered = sorted(current.values(), key=table_sort_key) if moved else \
+                [task for task in tasks if task["id"] in current]
+            tasks[:] = [
+                task for task in ordered
+                if (low is None or table_sort_key(task) >= low)
+                and (high is None or table_sort_key(task) <= high)
+            ]
+            index_tasks()
+        after_ids = set(task_index)
+
+        for task_id in before_ids - after_ids:
+            task_list.delete(str(task_id))
+        for task_id in moved & before_ids & after_ids:
+            task_list.detach(str(task_id))
+        if moved:
+            for index, task in enumerate(tasks):
+                if task["id"] not in moved:
+                    continue
+                if task["id"] in before_ids:
+                    task_list.move(str(task["id"]), "", index)
+                    task_list.item(str(task["id"]), values=task_row_values(task))
+                else:
+                    task_list.insert("", index, iid=str(task["id"]), values=task_row_values(task))
+                    metrics.count("tk items inserted")
+        for task in changed:
+            if task["id"] in after_ids and task["id"] not in moved:
+                task_list.item(str(task["id"]), values=task_row_values(current[task["id"]]))
+        refresh_dashboard()
+
+    def on_table_scroll(first, last):
+        nonlocal page_pending
+        table_scroll.set(first, last)
+        if page_pending or not tasks:
+            return
+        if search_active:
+            if float(last) >= 0.9 and search_more:
+                page_pending = True
+                window.after_idle(extend_search)
+            return
+        if not virtual_table:
+            return
+        if float(last) >= 0.9 and rows_after:
+            page_pending = True
+            window.after_idle(extend_window, True)
+        elif float(first) <= 0.1 and rows_before:
+            page_pending = True
+            window.after_idle(extend_window, False)
+
+    def extend_window(forward):
+        nonlocal page_pending
+        if not tasks:
+            page_pending = False
+            return
+        span = occurrence_window()
+        if forward:
+            key = page_key(tasks[-1])
+            worker.submit(lambda: db.fetch_task_page(after=key, limit=TABLE_PAGE_SIZE + 1, username=scope_user,
+                                                     window=span),
+                          on_done=lambda page: show_page(True, key, page))
+        else:
+            key = page_key(tasks[0])
+            worker.submit(lambda: db.fetch_task_page(before=key, limit=TABLE_PAGE_SIZE + 1, username=scope_user,
+                                                     window=span),
+                          on_done=lambda page: show_page(False, key, page))
+
+    def show_page(forward, key, page):
+        nonlocal rows_before, rows_after, page_pending
+        page_pending = False
+        # drop the page if the window moved or was reloaded while it was read
+        if not tasks or page_key(tasks[-1 if forward else 0]) != key:
+            return
+        if forward:
+            rows_after = len(page) > TABLE_PAGE_SIZE
+            page = page[:TABLE_PAGE_SIZE]
+            tasks.extend(page)
+            overflow = tasks[:max(len(tasks) - TABLE_WINDOW_ROWS, 0)]
+            del tasks[:len(overflow)]
+            task_index.update((task["id"], task) for task in page)
+            for task in page:
+                task_list.insert("", "end", iid=str(task["id"]), values=task_row_values(task))
+            metrics.count("tk items inserted", len(page))
+        else:
+            rows_before = len(page) > TABLE_PAGE_SIZE
+            page = page[-TABLE_PAGE_SIZE:]
+            tasks[:0] = page
+            overflow = tasks[TABLE_WINDOW_ROWS:]
+            del tasks[TABLE_WINDOW_ROWS:]
+            task_index.update((task["id"], task) for task in page)
+            for index, task in enumerate(page):
+                task_list.insert("", index, iid=str(task["id"]), values=task_row_values(task))
+            metrics.count("tk items inserted", len(page))
+        if overflow:
+            for task in overflow:
+                task_index.pop(task["id"], None)
+            task_list.delete(*(str(task["id"]) for task in overflow))
+            if forward:
+                rows_before = True
+            else:
+                rows_after = True
+        # keep the rows under the cursor in place after shifting the window
+        shift = len(page) if not forward else -len(overflow)
+        if shift:
+            task_list.yview_scroll(shift, "units")
+
+    def read_task_window():
+        # runs on the worker thread; reads the feed position first so nothing
+        # written during the load is missed
+        version = db.data_version()
+        seq = db.latest_task_change()
+        span = occurrence_window()
+        # warm start: the last full load, if nothing it was built from changed
+        loaded = db.load_task_snapshot(scope_user, span, seq)
+        if loaded is not None:
+            return version, seq, False, loaded, False, False
+        virtual = db.count_tasks(scope_user, span)[0] > VIRTUAL_TABLE_THRESHOLD
+        before = after = False
+        if virtual:
+            # open the window on today's tasks rather than the oldest ones
+            today = int(datetime.datetime.combine(datetime.date.today(), datetime.time()).timestamp())
+            page = db.fetch_task_page(after=(today, 0), limit=TABLE_WINDOW_ROWS + 1, username=scope_user,
+                                      window=span)
+            after = len(page) > TABLE_WINDOW_ROWS
+            loaded = page[:TABLE_WINDOW_ROWS]
+            if not loaded:
+                loaded = db.fetch_task_page(before=(today, 0), limit=TABLE_WINDOW_ROWS, username=scope_user,
+                                            window=span)
+            before = bool(loaded) and bool(
+                db.fetch_task_page(before=page_key(loaded[0]), limit=1, username=scope_user, window=span)
             )
-            for row in cursor.fetchall():
-                tasks.append({
-                    "id": row[0],
-                    "name": row[1],
-                    "subject": row[2],
-                    "section": row[3],
-                    "course": row[4],
-                    "year_level": row[5],
-                    "instructor": row[6],
-                    "term": row[7],
-                    "deadline": row[8],
-                    "status": row[9]
-                })
-        if refresh_ui:
-            refresh_task_table()
         else:
-            update_dashboard()
+            loaded = db.fetch_all_tasks(scope_user, span)
+            db.save_task_snapshot(loaded, scope_user, span, seq)
+        return version, seq, virtual, loaded, before, after
+
+    def load_tasks_from_db():
+        worker.submit(read_task_window, on_done=show_task_window)
+
+    def show_task_window(result):
+        nonlocal task_sync_version, task_sync_seq, task_sync_timer, virtual_table, rows_before, rows_after
+        task_sync_version, task_sync_seq, virtual_table, loaded, rows_before, rows_after = result
+        if search_active:
+            run_search()
+        else:
+            tasks[:] = loaded
+            index_tasks()
+            refresh_task_table()
+        rebuild_reminders()
+        if task_sync_timer is None:
+            task_sync_timer = window.after(TASK_SYNC_INTERVAL_MS, poll_task_changes)
+
+    def replace_occurrence(occurrence_id, stored):
+        # a completed or edited occurrence is now a stored task with its own
+        # id; None means another user got there first and the sync brings it in
+        apply_task_changes([stored] if stored is not None else [], [occurrence_id])
+        unschedule_reminder(occurrence_id)
+        if stored is not None:
+            schedule_reminder(stored)
 
     def get_selected_task():
         selected = task_list.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a task first!")
-            return None, None
-        task_id = int(selected[0])
-        for index, task in enumerate(tasks):
-            if task["id"] == task_id:
-                return index, task
-        return None, None
+            return None
+        return task_index.get(int(selected[0]))
+
+    def read_task_changes(since_seq, known_version):
+        # data_version only moves when another connection commits; our own
+        # writes are already applied locally, so an unchanged value means idle
+        version = db.data_version()
+        if version == known_version:
+            return version, (since_seq, [], set())
+        return version, db.fetch_task_changes(since_seq, scope_user)
+
+    def poll_task_changes():
+        worker.submit(read_task_changes, task_sync_seq, task_sync_version,
+                      on_done=apply_synced_changes, on_error=lambda _exc: rearm_task_sync())
+
+    def rearm_task_sync():
+        nonlocal task_sync_timer
+        task_sync_timer = window.after(TASK_SYNC_INTERVAL_MS, poll_task_changes)
+
+    def apply_synced_changes(result):
+        nonlocal task_sync_seq, task_sync_version
+        rearm_task_sync()
+        version, changes = result
+        if changes is None:
+            load_tasks_from_db()
+            return
+        task_sync_version = version
+        latest_seq, changed, deleted = changes
+        task_sync_seq = max(task_sync_seq, latest_seq)
+        if not changed and not deleted:
+            return
+
+        apply_task_changes(changed, deleted)
+        for task_id in deleted:
+            unschedule_reminder(task_id)
+        for task in changed:
+            schedule_reminder(task)
+
+    # ------------------ SEARCH ------------------
+    # while a search or filter is active `tasks` holds db.search_tasks pages in
+    # rank order instead of the deadline-ordered window; like the dashboard,
+    # at most one search is queued and keystrokes in the meantime coalesce
+    search_active = False
+    search_more = False
+    search_timer = None
+    search_pending = False
+    search_stale = False
+    search_generation = 0
+
+    def current_search():
+        filters = {
+            "term": "" if search_term_var.get() == "All" else search_term_var.get(),
+            "section": search_section_entry.get().strip(),
+            "course": search_course_entry.get().strip(),
+            "year_level": search_year_entry.get().strip(),
+            "status": "" if search_status_var.get() == "All" else search_status_var.get(),
+        }
+        return search_entry.get().strip(), {column: value for column, value in filters.items() if value}
+
+    def scoped(filters):
+        return dict(filters, enrolled_user=scope_user) if scope_user else filters
+
+    def schedule_search(_event=None):
+        nonlocal search_timer
+        if search_timer is not None:
+            window.after_cancel(search_timer)
+        search_timer = window.after(SEARCH_DEBOUNCE_MS, run_search)
+
+    def run_search():
+        nonlocal search_timer, search_active, search_pending, search_stale, search_generation
+        search_timer = None
+        if search_pending:
+            search_stale = True
+            return
+        text, filters = current_search()
+        search_generation += 1
+        if not text and not filters:
+            search_info.config(text="")
+            if search_active:
+                search_active = False
+                load_tasks_from_db()
+            return
+        search_active = True
+        search_pending = True
+        search_stale = False
+        generation = search_generation
+        worker.submit(db.search_tasks, text, scoped(filters), 0, TABLE_PAGE_SIZE + 1,
+                      on_done=lambda page: show_search_page(generation, page, True),
+                      on_error=search_failed)
+
+    def extend_search():
+        text, filters = current_search()
+        generation = search_generation
+        worker.submit(db.search_tasks, text, scoped(filters), len(tasks), TABLE_PAGE_SIZE + 1,
+                      on_done=lambda page: show_search_page(generation, page, False),
+                      on_error=search_failed)
+
+    def search_failed(exc):
+        nonlocal search_pending, page_pending
+        search_pending = page_pending = False
+        show_db_error(exc)
+
+    def show_search_page(generation, page, first):
+        nonlocal search_more, search_pending, page_pending
+        if first:
+            search_pending = False
+        else:
+            page_pending = False
+        if search_stale:
+            run_search()
+            return
+        if generation != search_generation or not search_active:
+            return
+        search_more = len(page) > TABLE_PAGE_SIZE
+        if first:
+            tasks.clear()
+            task_index.clear()
+            task_list.delete(*task_list.get_children())
+        # ranks can shift between pages, so skip rows that are already shown
+        page = [task for task in page[:TABLE_PAGE_SIZE] if task["id"] not in task_index]
+        tasks.extend(page)
+        task_index.update((task["id"], task) for task in page)
+        for task in page:
+            task_list.insert("", "end", iid=str(task["id"]), values=task_row_values(task))
+        metrics.count("tk items inserted", len(page))
+        search_info.config(text=f"{len(tasks)}{'+' if search_more else ''} matching tasks")
+
+    def apply_search_changes(changed, deleted):
+        # results stay in rank order: rows are patched where they are, and the
+        # search is re-run when a task outside the results changed
+        deleted = set(deleted) & set(task_index)
+        if deleted:
+            tasks[:] = [task for task in tasks if task["id"] not in deleted]
+            for task_id in deleted:
+                del task_index[task_id]
+            task_list.delete(*(str(task_id) for task_id in deleted))
+        rerun = False
+        for task in changed:
+            if task["id"] in deleted:
+                continue
+            existing = task_index.get(task["id"])
+            if existing is None:
+                rerun = True
+            else:
+                existing.update(task)
+                task_list.item(str(task["id"]), values=task_row_values(existing))
+        if rerun:
+            schedule_search()
+        refresh_dashboard()
+
+    def clear_search():
+        search_entry.delete(0, tk.END)
+        search_section_entry.delete(0, tk.END)
+        search_course_entry.delete(0, tk.END)
+        search_year_entry.delete(0, tk.END)
+        search_term_var.set("All")
+        search_status_var.set("All")
+        run_search()
 
     # ------------------ ADD TASK ------------------
     def add_task():
@@ -405,6 +807,8 @@ def open_main_window():
         term = term_var.get().strip()
         date = date_entry.get().strip()
         time = time_entry.get().strip()
+        interval_days = dict(REPEAT_OPTIONS)[repeat_var.get()]
+        until = until_entry.get().strip()
 
         if not all([name, subject, section, course, year_level, instructor_name, term, date, time]):
             messagebox.showerror("Error", "All fields are required!")
@@ -417,33 +821,53 @@ def open_main_window():
             return
 
         deadline = deadline_dt.strftime("%Y-%m-%d %I:%M %p")
+        deadline_ts = int(deadline_dt.timestamp())
 
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO tasks (name, subject, section, course, year_level, instructor, term, deadline, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (name, subject, section, course, year_level, instructor_name, term, deadline, "Pending")
+        if interval_days:
+            # stored once; the occurrences are generated as they come into view
+            if until:
+                try:
+                    until_dt = datetime.datetime.strptime(until, "%Y-%m-%d") + datetime.timedelta(days=1, seconds=-1)
+                except ValueError:
+                    messagebox.showerror("Error", "Repeat until must follow YYYY-MM-DD.")
+                    return
+            else:
+                until_dt = deadline_dt + datetime.timedelta(weeks=SEMESTER_WEEKS, seconds=-1)
+            if until_dt < deadline_dt:
+                messagebox.showerror("Error", "Repeat until cannot be before the first deadline.")
+                return
+            series = {
+                "name": name,
+                "subject": subject,
+                "section": section,
+                "course": course,
+                "year_level": year_level,
+                "instructor": instructor_name,
+                "term": term,
+                "starts_ts": deadline_ts,
+                "interval_days": interval_days,
+                "until_ts": int(until_dt.timestamp())
+            }
+            worker.submit(db.insert_series, series, on_done=lambda _series_id: load_tasks_from_db())
+        else:
+            task = db.TaskRecord(
+                name=name,
+                subject=subject,
+                section=section,
+                course=course,
+                year_level=year_level,
+                instructor=instructor_name,
+                term=term,
+                deadline=deadline,
+                status="Pending",
+                deadline_ts=deadline_ts
             )
-            task_id = cursor.lastrowid
-            conn.commit()
-
-        tasks.append({
-            "id": task_id,
-            "name": name,
-            "subject": subject,
-            "section": section,
-            "course": course,
-            "year_level": year_level,
-            "instructor": instructor_name,
-            "term": term,
-            "deadline": deadline,
-            "status": "Pending"
-        })
-
-        refresh_task_table()
+            def added(task_id):
+                task["id"] = task_id
+                apply_task_changes([task])
+                schedule_reminder(task)
+
+            worker.submit(db.insert_task, task, on_done=added)
 
         task_name_entry.delete(0, tk.END)
         subject_entry.delete(0, tk.END)
@@ -454,15 +878,19 @@ def open_main_window():
         term_var.set(TERM_OPTIONS[0])
         date_entry.delete(0, tk.END)
         time_entry.delete(0, tk.END)
+        repeat_var.set(REPEAT_OPTIONS[0][0])
+        until_entry.delete(0, tk.END)
 
     # ------------------ EDIT TASK ------------------
     def edit_task():
         if not can_manage:
             messagebox.showwarning("Permission", "Only instructors/admins can edit tasks.")
             return
-        index, task = get_selected_task()
+        task = get_selected_task()
         if task is None:
             return
+        # saving only succeeds if nobody else has written the task since now
+        loaded_version = task["version"]
 
         edit = tk.Toplevel(window)
         edit.title("Edit Task")
@@ -518,11 +946,11 @@ def open_main_window():
         year_entry_modal = input_field("Year Level:", task["year_level"])
         instructor_entry_modal = input_field("Instructor:", task["instructor"])
 
-        try:
-            deadline_dt = datetime.datetime.strptime(task["deadline"], "%Y-%m-%d %I:%M %p")
+        if task["deadline_ts"] is not None:
+            deadline_dt = datetime.datetime.fromtimestamp(task["deadline_ts"])
             date_part = deadline_dt.strftime("%Y-%m-%d")
             time_part = deadline_dt.strftime("%I:%M %p")
-        except ValueError:
+        else:
             parts = task["deadline"].split(" ", 1)
             date_part = parts[0]
             time_part = parts[1] if len(parts) > 1 else ""
@@ -558,31 +986,57 @@ def open_main_window():
                 return
 
             new_deadline = new_deadline_dt.strftime("%Y-%m-%d %I:%M %p")
-
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    UPDATE tasks
-                    SET name = ?, subject = ?, section = ?, course = ?, year_level = ?,
-                        instructor = ?, term = ?, deadline = ?
-                    WHERE id = ?
-                    """,
-                    (new_name, new_subject, new_section, new_course, new_year,
-                     new_instructor, new_term, new_deadline, task["id"])
+            new_deadline_ts = int(new_deadline_dt.timestamp())
+
+            changes = {
+                "name": new_name,
+                "subject": new_subject,
+                "section": new_section,
+                "course": new_course,
+                "year_level": new_year,
+                "instructor": new_instructor,
+                "term": new_term,
+                "deadline": new_deadline,
+                "deadline_ts": new_deadline_ts
+            }
+            def saved(version):
+                if version is None:
+                    worker.submit(db.fetch_task, task["id"], on_done=resolve_conflict)
+                    return
+                # the saved row is the loaded one plus these changes; only patch it
+                # in while it is still loaded, as the dialog may outlive the window
+                updated = task.copy()
+                updated.update(changes)
+                updated["version"] = version
+                if task["id"] in task_index:
+                    apply_task_changes([updated])
+                schedule_reminder(updated)
+
+            def resolve_conflict(current):
+                if current is None:
+                    apply_task_changes(deleted=[task["id"]])
+                    unschedule_reminder(task["id"])
+                    messagebox.showwarning("Edit Conflict",
+                                           f"'{changes['name']}' was deleted by another user; your changes were not saved.")
+                    return
+                apply_task_changes([current])
+                schedule_reminder(current)
+                theirs = "\n".join(
+                    f"{column.replace('_', ' ').title()}: {current[column]}  (yours: {changes[column]})"
+                    for column in changes if column != "deadline_ts" and current[column] != changes[column]
                 )
-                conn.commit()
-
-            tasks[index]["name"] = new_name
-            tasks[index]["subject"] = new_subject
-            tasks[index]["section"] = new_section
-            tasks[index]["course"] = new_course
-            tasks[index]["year_level"] = new_year
-            tasks[index]["instructor"] = new_instructor
-            tasks[index]["term"] = new_term
-            tasks[index]["deadline"] = new_deadline
-
-            refresh_task_table()
+                if messagebox.askyesno("Edit Conflict",
+                                       "Another user changed this task after you opened it.\n\n"
+                                       f"{theirs or 'They made the same changes as you.'}\n\n"
+                                       "Save your version over theirs?"):
+                    worker.submit(db.update_task, task["id"], changes, current["version"], on_done=saved)
+
+            if db.is_occurrence_id(task["id"]):
+                # only this occurrence changes; the rest of the series stays as it was
+                worker.submit(db.materialize_occurrence, task["id"], changes,
+                              on_done=lambda stored: replace_occurrence(task["id"], stored))
+            else:
+                worker.submit(db.update_task, task["id"], changes, loaded_version, on_done=saved)
             edit.destroy()
 
         tk.Button(form, text="Save", bg=PRIMARY, fg="white",
@@ -593,114 +1047,784 @@ def open_main_window():
         if not can_manage:
             messagebox.showwarning("Permission", "Only instructors/admins can delete tasks.")
             return
-        index, task = get_selected_task()
+        task = get_selected_task()
         if task is None:
             return
 
-        if not messagebox.askyesno("Confirm", f"Delete task '{task['name']}'?"):
+        if db.is_occurrence_id(task["id"]):
+            answer = messagebox.askyesnocancel(
+                "Delete Recurring Task",
+                f"'{task['name']}' repeats.\n\nYes: delete only this occurrence.\n"
+                "No: delete every occurrence not yet completed or edited."
+            )
+            if answer is None:
+                return
+            if not answer:
+                worker.submit(db.delete_series, db.split_occurrence_id(task["id"])[0],
+                              on_done=lambda _result: load_tasks_from_db())
+                return
+        elif not messagebox.askyesno("Confirm", f"Delete task '{task['name']}'?"):
             return
 
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM tasks WHERE id = ?", (task["id"],))
-            conn.commit()
+        def deleted(_result):
+            apply_task_changes(deleted=[task["id"]])
+            unschedule_reminder(task["id"])
 
-        del tasks[index]
-        refresh_task_table()
+        worker.submit(db.delete_task, task["id"], on_done=deleted)
 
     # ------------------ CSV IMPORT ------------------
-    """
     def import_csv():
+        if not can_manage:
+            messagebox.showwarning("Permission", "Only instructors/admins can import schedules.")
+            return
         file = filedialog.askopenfilename(filetypes=[("CSV", "*.csv")])
         if not file:
             return
-        with open(file, "r") as f:
-            r = csv.reader(f)
-            next(r)
-            for row in r:
-                name, subject, deadline, status = row
-                tasks.append({"name": name, "subject": subject,
-                              "deadline": deadline, "status": status})
-                task_list.insert("", "end", values=row)
-        update_dashboard()
-    """
+
+        def show_progress(imported, skipped):
+            io_status.config(text=f"Importing... {imported} rows imported, {skipped} skipped")
+
+        def run_import():
+            return schedule_csv.import_tasks_csv(
+                file, progress=lambda imported, skipped: worker.post(show_progress, imported, skipped)
+            )
+
+        def imported(result):
+            # one full reload instead of a table update per imported row
+            load_tasks_from_db()
+            io_status.config(text=f"Imported {result[0]} tasks ({result[1]} rows skipped).")
+
+        def import_failed(exc):
+            io_status.config(text="")
+            messagebox.showerror("Error", f"Could not import '{file}':\n{exc}")
+
+        io_status.config(text="Importing...")
+        worker.submit(run_import, on_done=imported, on_error=import_failed)
+
     # ------------------ CSV EXPORT ------------------
+    export_running = False
+
     def export_csv():
         if not can_manage:
             messagebox.showwarning("Permission", "Only instructors/admins can export schedules.")
             return
-        file = filedialog.asksaveasfilename(defaultextension=".csv")
-        if not file:
+        if export_running:
+            messagebox.showinfo("Export", "An export is already running.")
             return
-        with open(file, "w", newline="") as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(["Name", "Subject", "Section", "Course", "Year", "Instructor", "Term", "Deadline", "Status"])
-            for task in tasks:
-                writer.writerow([
-                    task["name"],
-                    task["subject"],
-                    task["section"],
-                    task["course"],
-                    task["year_level"],
-                    task["instructor"],
-                    task["term"],
-                    task["deadline"],
-                    task["status"],
-                ])
+
+        dialog = tk.Toplevel(window)
+        dialog.title("Export Schedule")
+        dialog.geometry("420x560")
+        dialog.configure(bg=BG)
+
+        tk.Label(dialog, text="Export Schedule", font=("Segoe UI", 18), bg=BG).pack(pady=15)
+
+        def filter_field(text):
+            tk.Label(dialog, text=text, bg=BG, font=("Segoe UI", 12)).pack()
+            entry = tk.Entry(dialog, width=30, font=("Segoe UI", 12))
+            entry.pack(pady=5)
+            return entry
+
+        def filter_choice(text, values):
+            tk.Label(dialog, text=text, bg=BG, font=("Segoe UI", 12)).pack()
+            var = tk.StringVar(value=values[0])
+            ttk.Combobox(dialog, values=values, textvariable=var, state="readonly",
+                         width=28, font=("Segoe UI", 12)).pack(pady=5)
+            return var
+
+        term_filter = filter_choice("Term:", ("All",) + TERM_OPTIONS)
+        section_filter = filter_field("Section:")
+        course_filter = filter_field("Course:")
+        status_filter = filter_choice("Status:", ("All", "Pending", "Completed"))
+        from_filter = filter_field("Due from (YYYY-MM-DD):")
+        to_filter = filter_field("Due until (YYYY-MM-DD):")
+        gzip_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(dialog, text="Compress with gzip", variable=gzip_var,
+                       bg=BG, font=("Segoe UI", 12)).pack(pady=5)
+        archive_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(dialog, text="Include archived tasks", variable=archive_var,
+                       bg=BG, font=("Segoe UI", 12)).pack(pady=5)
+
+        def start():
+            filters = {
+                "term": "" if term_filter.get() == "All" else term_filter.get(),
+                "section": section_filter.get().strip(),
+                "course": course_filter.get().strip(),
+                "status": "" if status_filter.get() == "All" else status_filter.get(),
+                "include_archive": archive_var.get(),
+            }
+            from_text = from_filter.get().strip()
+            to_text = to_filter.get().strip()
+            try:
+                if from_text:
+                    from_day = datetime.datetime.strptime(from_text, "%Y-%m-%d")
+                    filters["deadline_from"] = int(from_day.timestamp())
+                if to_text:
+                    # inclusive: everything before midnight after the given day
+                    to_day = datetime.datetime.strptime(to_text, "%Y-%m-%d") + datetime.timedelta(days=1)
+                    filters["deadline_to"] = int(to_day.timestamp()) - 1
+            except ValueError:
+                messagebox.showerror("Error", "Dates must follow YYYY-MM-DD.", parent=dialog)
+                return
+
+            compress = gzip_var.get()
+            file = filedialog.asksaveasfilename(defaultextension=".csv.gz" if compress else ".csv")
+            if not file:
+                return
+            dialog.destroy()
+            run_export(file, filters, compress or file.endswith(".gz"))
+
+        tk.Button(dialog, text="Export", bg=WARNING, fg="white",
+                  width=15, font=("Segoe UI", 12), command=start).pack(pady=20)
+
+    def run_export(file, filters, compress):
+        # the export streams from its own thread-local connection; progress is
+        # handed back through a queue and drained on the Tk thread
+        nonlocal export_running
+        export_running = True
+        progress_queue = queue.Queue()
+
+        def export_worker():
+            try:
+                count = schedule_csv.export_tasks_csv(
+                    file, filters, compress,
+                    progress=lambda done, total: progress_queue.put(("progress", done, total))
+                )
+                progress_queue.put(("done", count, None))
+            except Exception as exc:
+                progress_queue.put(("error", exc, None))
+            finally:
+                db.close_connection()
+
+        export_progress.config(value=0)
+        export_progress.pack(pady=(0, 10))
+        io_status.config(text="Exporting...")
+        threading.Thread(target=export_worker, daemon=True).start()
+        window.after(100, poll_export, progress_queue, file)
+
+    def poll_export(progress_queue, file):
+        nonlocal export_running
+        while True:
+            try:
+                kind, value, total = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if total:
+                    export_progress.config(value=100 * value / total)
+                io_status.config(text=f"Exporting... {value} of {total} rows")
+                continue
+            export_running = False
+            export_progress.pack_forget()
+            if kind == "done":
+                io_status.config(text=f"Exported {value} tasks to {file}.")
+            else:
+                io_status.config(text="")
+                messagebox.showerror("Error", f"Could not export '{file}':\n{value}")
+            return
+        window.after(100, poll_export, progress_queue, file)
 
     # ------------------ MARKED DONE ------------------
     def mark_done():
-        index, task = get_selected_task()
+        task = get_selected_task()
         if task is None:
             return
 
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE tasks SET status = 'Completed' WHERE id = ?", (task["id"],))
-            conn.commit()
+        def completed(_result):
+            # a sync or a window move may have dropped the row meanwhile; a
+            # partial record must not be inserted in its place
+            if task["id"] in task_index:
+                apply_task_changes([{"id": task["id"], "status": "Completed"}])
+            unschedule_reminder(task["id"])
 
-        tasks[index]["status"] = "Completed"
-        refresh_task_table()
+        if db.is_occurrence_id(task["id"]):
+            worker.submit(db.materialize_occurrence, task["id"], {"status": "Completed"},
+                          on_done=lambda stored: replace_occurrence(task["id"], stored))
+            return
+        worker.submit(db.set_task_status, task["id"], "Completed", on_done=completed)
 
-    # ------------------ NOTIFICATION CHECKER ------------------
-    def check_notifications():
-        load_tasks_from_db(refresh_ui=False)
-        now = datetime.datetime.now()
+    # ------------------ ARCHIVE ------------------
+    # finished terms and old completed tasks move to schedule_archive.db, so the
+    # live table (and every load, count and reminder scan) only holds what is
+    # still actionable; Export can include them again
+    def manage_archive():
+        if not can_manage:
+            messagebox.showwarning("Permission", "Only instructors/admins can archive tasks.")
+            return
+        worker.submit(db.fetch_archive_counts, on_done=open_archive)
+
+    def open_archive(counts):
+        dialog = tk.Toplevel(window)
+        dialog.title("Archive")
+        dialog.geometry("420x600")
+        dialog.configure(bg=BG)
+
+        tk.Label(dialog, text="Task Archive", font=("Segoe UI", 18), bg=BG).pack(pady=15)
+
+        archive_list = ttk.Treeview(dialog, columns=("Term", "Archived"), show="headings", height=5)
+        for col in ("Term", "Archived"):
+            archive_list.heading(col, text=col)
+            archive_list.column(col, width=160, anchor="center")
+        archive_list.pack(pady=10)
+
+        tk.Label(dialog, text="Finished terms:", bg=BG, font=("Segoe UI", 12)).pack()
+        term_vars = {}
+        for term in TERM_OPTIONS:
+            term_vars[term] = tk.BooleanVar(value=False)
+            tk.Checkbutton(dialog, text=term, variable=term_vars[term],
+                           bg=BG, font=("Segoe UI", 12)).pack()
+
+        completed_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(dialog, text="Also completed tasks due more than N days ago", variable=completed_var,
+                       bg=BG, font=("Segoe UI", 12)).pack(pady=(10, 0))
+        days_entry = tk.Entry(dialog, width=8, font=("Segoe UI", 12))
+        days_entry.insert(0, str(ARCHIVE_COMPLETED_DAYS))
+        days_entry.pack(pady=5)
+
+        def show_counts(rows):
+            if not dialog.winfo_exists():
+                return
+            archive_list.delete(*archive_list.get_children())
+            for row in rows:
+                archive_list.insert("", "end", values=row)
 
-        for t in tasks:
-            if t["status"] != "Pending":
-                continue
+        def selected_terms():
+            return [term for term, var in term_vars.items() if var.get()]
 
-            # PARSE DEADLINE WITH TIME
-            try:
-                deadline_dt = datetime.datetime.strptime(t["deadline"], "%Y-%m-%d %I:%M %p")
-            except ValueError:
+        def archive():
+            terms = selected_terms()
+            completed_before = None
+            if completed_var.get():
                 try:
-                    deadline_dt = datetime.datetime.strptime(t["deadline"], "%Y-%m-%d %H:%M")
+                    completed_before = int(time.time() - float(days_entry.get().strip()) * 86400)
                 except ValueError:
-                    continue
+                    messagebox.showerror("Error", "Days must be a number.", parent=dialog)
+                    return
+            if not terms and completed_before is None:
+                messagebox.showwarning("Archive", "Tick a term or the completed tasks option.", parent=dialog)
+                return
+            worker.submit(db.count_archivable_tasks, terms, completed_before,
+                          on_done=lambda count: confirm_archive(terms, completed_before, count))
+
+        def confirm_archive(terms, completed_before, count):
+            if not count:
+                messagebox.showinfo("Archive", "There is nothing to archive.", parent=dialog)
+                return
+            if not messagebox.askyesno("Archive",
+                                       f"Move {count} tasks to the archive?\n\n"
+                                       "They leave the task list, the dashboard and reminders; "
+                                       "Export can still include them.", parent=dialog):
+                return
+            worker.submit(db.archive_tasks, terms, completed_before,
+                          on_done=lambda moved: archive_changed(f"Archived {moved} tasks."))
+
+        def restore():
+            terms = selected_terms()
+            if not terms:
+                messagebox.showwarning("Archive", "Tick the terms to restore.", parent=dialog)
+                return
+            worker.submit(db.restore_archived_tasks, terms,
+                          on_done=lambda restored: archive_changed(f"Restored {restored} archived tasks."))
+
+        def archive_changed(message):
+            io_status.config(text=message)
+            load_tasks_from_db()
+            worker.submit(db.fetch_archive_counts, on_done=show_counts)
+
+        buttons = tk.Frame(dialog, bg=BG)
+        buttons.pack(pady=15)
+        tk.Button(buttons, text="Archive", bg=WARNING, fg="white", width=14,
+                  font=("Segoe UI", 12), command=archive).grid(row=0, column=0, padx=10)
+        tk.Button(buttons, text="Restore Terms", bg=INFO, fg="white", width=14,
+                  font=("Segoe UI", 12), command=restore).grid(row=0, column=1, padx=10)
+        show_counts(counts)
+
+    # ------------------ ENROLLMENTS ------------------
+    def manage_enrollments():
+        if not can_manage:
+            messagebox.showwarning("Permission", "Only instructors/admins can manage enrollments.")
+            return
+        worker.submit(db.fetch_usernames, "", "student", STUDENT_LOOKUP_LIMIT, on_done=open_enrollments)
+
+    def open_enrollments(students):
+        if not students:
+            messagebox.showinfo("Enrollments", "There are no student accounts yet.")
+            return
+
+        dialog = tk.Toplevel(window)
+        dialog.title("Enrollments")
+        dialog.geometry("520x560")
+        dialog.configure(bg=BG)
+
+        tk.Label(dialog, text="Student Enrollments", font=("Segoe UI", 18), bg=BG).pack(pady=15)
+
+        # type to narrow the list; only STUDENT_LOOKUP_LIMIT names are fetched at a time
+        student_var = tk.StringVar(value=students[0])
+        student_combo = ttk.Combobox(dialog, values=students, textvariable=student_var,
+                                     width=28, font=("Segoe UI", 12))
+        student_combo.pack(pady=5)
+
+        enrollment_list = ttk.Treeview(dialog, columns=("Section", "Course", "Year"), show="headings", height=8)
+        for col in ("Section", "Course", "Year"):
+            enrollment_list.heading(col, text=col)
+            enrollment_list.column(col, width=140, anchor="center")
+        enrollment_list.pack(pady=10)
+
+        form = tk.Frame(dialog, bg=BG)
+        form.pack(pady=5)
+        fields = []
+        for column, text in enumerate(("Section:", "Course:", "Year Level:")):
+            tk.Label(form, text=text, bg=BG, font=("Segoe UI", 12)).grid(row=0, column=column)
+            entry = tk.Entry(form, width=12, font=("Segoe UI", 12))
+            entry.grid(row=1, column=column, padx=5)
+            fields.append(entry)
+
+        def show_enrollments(rows):
+            enrollment_list.delete(*enrollment_list.get_children())
+            for row in rows:
+                enrollment_list.insert("", "end", values=row)
+
+        def reload_enrollments(_event=None):
+            worker.submit(db.fetch_enrollments, student_var.get().strip(), on_done=show_enrollments)
+
+        def lookup_students(event):
+            if event.keysym in ("Return", "Up", "Down"):
+                return
+            worker.submit(db.fetch_usernames, student_var.get().strip(), "student", STUDENT_LOOKUP_LIMIT,
+                          on_done=lambda names: student_combo.configure(values=names))
+
+        def enroll_student(student, section, course, year_level):
+            user = db.fetch_user(student)
+            if user is None or user["role"] != "student":
+                return False
+            db.enroll_user(student, section, course, year_level)
+            return True
+
+        def enrolled(ok):
+            if not ok:
+                messagebox.showerror("Error", f"No student named '{student_var.get().strip()}'.", parent=dialog)
+                return
+            reload_enrollments()
+
+        def enroll():
+            section, course, year_level = (entry.get().strip() for entry in fields)
+            if not section or not course or not year_level:
+                messagebox.showerror("Error", "Section, course and year level are required.", parent=dialog)
+                return
+            worker.submit(enroll_student, student_var.get().strip(), section, course, year_level,
+                          on_done=enrolled)
+
+        def unenroll():
+            selected = enrollment_list.selection()
+            if not selected:
+                return
+            section, course, year_level = enrollment_list.item(selected[0])["values"]
+            worker.submit(db.unenroll_user, student_var.get().strip(), str(section), str(course), str(year_level),
+                          on_done=lambda _result: reload_enrollments())
+
+        student_combo.bind("<<ComboboxSelected>>", reload_enrollments)
+        student_combo.bind("<Return>", reload_enrollments)
+        student_combo.bind("<KeyRelease>", lookup_students)
+        buttons = tk.Frame(dialog, bg=BG)
+        buttons.pack(pady=15)
+        tk.Button(buttons, text="Enroll", bg=PRIMARY, fg="white", width=12,
+                  font=("Segoe UI", 12), command=enroll).grid(row=0, column=0, padx=10)
+        tk.Button(buttons, text="Remove", bg=DANGER, fg="white", width=12,
+                  font=("Segoe UI", 12), command=unenroll).grid(row=0, column=1, padx=10)
+        reload_enrollments()
+
+    # ------------------ DIAGNOSTICS ------------------
+    # admin-only view of schedule_metrics: SQLite latency per db function,
+    # Tk work and reminder scans. Collection is off unless switched on here
+    # or with SCHEDULE_METRICS=1, and snapshots can go to a rotating file
+    metrics_file_timer = None
+
+    def write_metrics_file():
+        nonlocal metrics_file_timer
+        metrics_file_timer = None
+        if not metrics.file_active():
+            return
+        if metrics.enabled:
+            metrics.write_snapshot()
+        metrics_file_timer = window.after(METRICS_FILE_INTERVAL_MS, write_metrics_file)
+
+    def start_metrics_file():
+        nonlocal metrics_file_timer
+        if metrics.file_active() and metrics_file_timer is None:
+            metrics_file_timer = window.after(METRICS_FILE_INTERVAL_MS, write_metrics_file)
+
+    def format_ms(value):
+        return "-" if value is None else f"{value:.2f}"
+
+    def open_diagnostics():
+        dialog = tk.Toplevel(window)
+        dialog.title("Diagnostics")
+        dialog.configure(bg=BG)
+        dialog.transient(window)
+
+        collect_var = tk.BooleanVar(value=metrics.enabled)
+        file_var = tk.BooleanVar(value=metrics.file_active())
+        panel_timer = None
+
+        def toggle_collect():
+            metrics.enable(collect_var.get())
+
+        def toggle_file():
+            if file_var.get():
+                try:
+                    metrics.start_file()
+                except OSError as exc:
+                    file_var.set(False)
+                    messagebox.showerror("Diagnostics", f"Cannot write {metrics.METRICS_FILE}:\n{exc}", parent=dialog)
+                    return
+                start_metrics_file()
+            else:
+                metrics.stop_file()
+
+        def reset_metrics():
+            metrics.reset()
+            render_metrics()
+
+        def render_metrics():
+            nonlocal panel_timer
+            panel_timer = None
+            report = metrics.snapshot()
+            metrics_list.delete(*metrics_list.get_children())
+            histograms = sorted(report["histograms"].items(), key=lambda item: -item[1]["total_ms"])
+            for name, histogram in histograms:
+                metrics_list.insert("", "end", values=(
+                    name, histogram["calls"], format_ms(histogram["total_ms"] / histogram["calls"]),
+                    format_ms(histogram["p50_ms"]), format_ms(histogram["p95_ms"]),
+                    format_ms(histogram["max_ms"]), format_ms(histogram["total_ms"]),
+                ))
+            for name, value in sorted(report["counters"].items()):
+                metrics_list.insert("", "end", values=(name, value, "", "", "", "", ""))
+            state = "collecting" if metrics.enabled else "off"
+            metrics_status.config(text=f"Metrics {state}; {worker.in_flight} database jobs in flight")
+            panel_timer = dialog.after(METRICS_PANEL_MS, render_metrics)
+
+        def _stop_panel(event):
+            if event.widget is dialog and panel_timer is not None:
+                dialog.after_cancel(panel_timer)
+
+        options = tk.Frame(dialog, bg=BG)
+        options.pack(fill="x", padx=10, pady=(10, 0))
+        tk.Checkbutton(options, text="Collect metrics", variable=collect_var, bg=BG,
+                       font=("Segoe UI", 12), command=toggle_collect).pack(side="left")
+        tk.Checkbutton(options, text=f"Write to {metrics.METRICS_FILE.name}", variable=file_var, bg=BG,
+                       font=("Segoe UI", 12), command=toggle_file).pack(side="left", padx=10)
+        tk.Button(options, text="Reset", bg=DANGER, fg="white", width=10,
+                  command=reset_metrics).pack(side="right")
+        metrics_status = tk.Label(dialog, text="", bg=BG, fg="#444", font=("Segoe UI", 11))
+        metrics_status.pack(anchor="w", padx=10)
+
+        metric_columns = ("Metric", "Calls", "Avg ms", "p50 ms", "p95 ms", "Max ms", "Total ms")
+        metrics_list = ttk.Treeview(dialog, columns=metric_columns, show="headings", height=16)
+        for col in metric_columns:
+            metrics_list.heading(col, text=col)
+            metrics_list.column(col, width=300 if col == "Metric" else 90,
+                                anchor="w" if col == "Metric" else "e")
+        metrics_list.pack(padx=10, pady=10)
+        dialog.bind("<Destroy>", _stop_panel, add="+")
+        render_metrics()
+
+    # ------------------ NOTIFICATION SCHEDULER ------------------
+    # heap entries are (trigger_ts, task_id, stage, deadline_ts); an entry is
+    # only live while it matches reminder_state[task_id] == (deadline_ts, stage).
+    # What each user has already been shown is kept in task_notifications, so
+    # a restart picks up at the next stage instead of alerting everything again
+    reminder_heap = []
+    reminder_state = {}
+    reminder_timer = None
+    reminder_wake_at = None
+
+    def find_loaded_task(task_id):
+        return task_index.get(task_id)
+
+    def push_reminder(task_id, deadline_ts, stage, not_before=None):
+        now = time.time()
+        while stage + 1 < len(REMINDER_STAGES) and deadline_ts - REMINDER_STAGES[stage + 1][0] <= now:
+            stage += 1
+        reminder_state[task_id] = (deadline_ts, stage)
+        if stage >= len(REMINDER_STAGES):
+            return
+        trigger_ts = deadline_ts - REMINDER_STAGES[stage][0]
+        if not_before is not None:
+            trigger_ts = max(trigger_ts, not_before)
+        heapq.heappush(reminder_heap, (trigger_ts, task_id, stage, deadline_ts))
+        if len(reminder_heap) > 2 * len(reminder_state) + 64:
+            compact_reminders()
+
+    def compact_reminders():
+        # keep the live entries as they are; snoozed ones carry their own trigger
+        reminder_heap[:] = [
+            entry for entry in reminder_heap
+            if reminder_state.get(entry[1]) == (entry[3], entry[2])
+        ]
+        heapq.heapify(reminder_heap)
+
+    def schedule_reminder(task):
+        deadline_ts = task["deadline_ts"]
+        if task["status"] != "Pending" or deadline_ts is None:
+            unschedule_reminder(task["id"])
+            return
+        state = reminder_state.get(task["id"])
+        if state is not None and state[0] == deadline_ts:
+            refresh_digest_entry(task)
+            return
+        drop_from_digest(task["id"])
+        push_reminder(task["id"], deadline_ts, 0)
+        arm_reminder_timer()
+
+    def unschedule_reminder(task_id):
+        # the heap entry goes stale and is dropped when it reaches the top
+        reminder_state.pop(task_id, None)
+        drop_from_digest(task_id)
+
+    def read_reminders():
+        return (db.fetch_pending_deadlines(None, None, scope_user, occurrence_window()),
+                db.fetch_notification_state(current_user))
+
+    def rebuild_reminders():
+        worker.submit(read_reminders, on_done=seed_reminders)
+
+    def seed_reminders(result):
+        pending, notified = result
+        reminder_state.clear()
+        reminder_heap.clear()
+        now = time.time()
+        started = time.perf_counter()
+        # already shown and still at that stage: back in the digest, no bell
+        quiet = {}
+        for task_id, deadline_ts in pending:
+            stage, snoozed_until, acknowledged = notified.get(task_id, (-1, None, False))
+            if acknowledged:
+                continue
+            if snoozed_until is not None:
+                push_reminder(task_id, deadline_ts, stage, snoozed_until)
+                continue
+            push_reminder(task_id, deadline_ts, stage + 1)
+            if stage >= 0 and db.reminder_stage(deadline_ts, now) == stage:
+                quiet[task_id] = stage
+        for task_id in [task_id for task_id in digest if task_id not in reminder_state]:
+            drop_from_digest(task_id)
+        arm_reminder_timer()
+        metrics.observe("reminders seed", (time.perf_counter() - started) * 1000)
+        if quiet:
+            worker.submit(db.fetch_tasks, list(quiet), on_done=lambda found: restore_digest(found, quiet))
+
+    def restore_digest(found, stages):
+        for task in found:
+            if task["id"] in reminder_state and task["id"] not in digest:
+                add_to_digest(task, stages[task["id"]], quiet=True)
+
+    def arm_reminder_timer():
+        nonlocal reminder_timer, reminder_wake_at
+        while reminder_heap:
+            _, task_id, stage, deadline_ts = reminder_heap[0]
+            if reminder_state.get(task_id) == (deadline_ts, stage):
+                break
+            heapq.heappop(reminder_heap)
+        if not reminder_heap:
+            return
+        now = time.time()
+        delay = min(max(int((reminder_heap[0][0] - now) * 1000), 0), REMINDER_MAX_WAIT_MS)
+        wake_at = now + delay / 1000
+        if reminder_timer is not None:
+            if reminder_wake_at <= wake_at:
+                return
+            window.after_cancel(reminder_timer)
+        reminder_wake_at = wake_at
+        reminder_timer = window.after(delay, fire_reminders)
+
+    # ------------------ REMINDER DIGEST ------------------
+    # fired reminders collect in one non-modal panel instead of a dialog per
+    # task; redraws are batched to one per DIGEST_RENDER_MS and only rows whose
+    # group or text changed are touched
+    digest = {}
+    digest_rendered = {}
+    digest_timer = None
+    digest_new = False
+
+    def digest_values(task):
+        return (task["name"], task["subject"], task["deadline"])
+
+    def add_to_digest(task, stage, quiet=False):
+        nonlocal digest_new
+        if task is None:
+            return
+        if not quiet and digest.get(task["id"], (None,))[0] != stage:
+            digest_new = True
+        digest[task["id"]] = (stage, digest_values(task))
+        request_digest_render()
+
+    def refresh_digest_entry(task):
+        entry = digest.get(task["id"])
+        if entry is not None and entry[1] != digest_values(task):
+            digest[task["id"]] = (entry[0], digest_values(task))
+            request_digest_render()
+
+    def drop_from_digest(task_id):
+        if digest.pop(task_id, None) is not None:
+            request_digest_render()
+
+    def request_digest_render():
+        nonlocal digest_timer
+        if digest_timer is None:
+            digest_timer = window.after(DIGEST_RENDER_MS, render_digest)
+
+    def render_digest():
+        nonlocal digest_timer, digest_rendered, digest_new
+        digest_timer = None
+        gone = [str(task_id) for task_id in digest_rendered if task_id not in digest]
+        if gone:
+            digest_list.delete(*gone)
+        counts = dict.fromkeys(range(len(REMINDER_STAGES)), 0)
+        for task_id, (stage, values) in digest.items():
+            counts[stage] += 1
+            shown = digest_rendered.get(task_id)
+            if shown is None:
+                digest_list.insert(f"group-{stage}", "end", iid=str(task_id), values=values)
+                continue
+            if shown[0] != stage:
+                digest_list.move(str(task_id), f"group-{stage}", "end")
+            if shown[1] != values:
+                digest_list.item(str(task_id), values=values)
+        digest_rendered = dict(digest)
+
+        for stage, heading in DIGEST_GROUPS:
+            digest_list.item(f"group-{stage}", text=f"{heading} ({counts[stage]})")
+        parts = [f"{counts[stage]} {heading.lower()}" for stage, heading in DIGEST_GROUPS if counts[stage]]
+        digest_summary.config(text="Reminders: " + (", ".join(parts) if parts else "nothing due"))
+        if digest_new:
+            digest_new = False
+            window.bell()
+
+    def selected_alerts():
+        return [int(iid) for iid in digest_list.selection() if not iid.startswith("group-")]
+
+    def snooze_alerts():
+        # shown again at the stage it is at once the snooze runs out
+        until = int(time.time()) + SNOOZE_SECONDS
+        snoozed = []
+        for task_id in selected_alerts():
+            state = reminder_state.get(task_id)
+            if state is None or task_id not in digest:
+                continue
+            push_reminder(task_id, state[0], digest[task_id][0], until)
+            drop_from_digest(task_id)
+            snoozed.append(task_id)
+        if snoozed:
+            arm_reminder_timer()
+            worker.submit(db.snooze_notifications, current_user, snoozed, until)
+
+    def acknowledge_alerts():
+        # no more reminders for these until their deadline or status changes
+        acknowledged = selected_alerts()
+        for task_id in acknowledged:
+            unschedule_reminder(task_id)
+        if acknowledged:
+            worker.submit(db.acknowledge_notifications, current_user, acknowledged)
+
+    def dismiss_all_alerts():
+        digest.clear()
+        request_digest_render()
+
+    def show_alert_task(_event=None):
+        # jump to the task in the table when it is loaded
+        for task_id in selected_alerts():
+            if task_list.exists(str(task_id)):
+                task_list.selection_set(str(task_id))
+                task_list.see(str(task_id))
+                return
 
-            time_diff = (deadline_dt - now).total_seconds()
+    def fire_reminders():
+        nonlocal reminder_timer, reminder_wake_at
+        reminder_timer = None
+        reminder_wake_at = None
+        now = time.time()
+        started = time.perf_counter()
+        due = []
+        while reminder_heap and reminder_heap[0][0] <= now:
+            _, task_id, stage, deadline_ts = heapq.heappop(reminder_heap)
+            if reminder_state.get(task_id) != (deadline_ts, stage):
+                continue
+            due.append((task_id, stage, deadline_ts))
+            push_reminder(task_id, deadline_ts, stage + 1)
+        arm_reminder_timer()
+        metrics.observe("reminders scan", (time.perf_counter() - started) * 1000)
+        metrics.count("reminders fired", len(due))
+        if due:
+            worker.submit(db.record_notifications, current_user, due, now)
+
+        missing = {}
+        for task_id, stage, deadline_ts in due:
+            task = find_loaded_task(task_id)
+            if task is not None:
+                add_to_digest(task, stage)
+            else:
+                missing[task_id] = stage
+        if missing:
+            # outside the virtual window; fetched together in one call before alerting
+            worker.submit(db.fetch_tasks, list(missing), on_done=lambda found: alert_fetched(found, missing))
+
+    def alert_fetched(found, stages):
+        for task in found:
+            add_to_digest(task, stages[task["id"]])
+
+    def _cancel_timers(event):
+        if event.widget is not window:
+            return
+        for timer in (reminder_timer, task_sync_timer, digest_timer, metrics_file_timer):
+            if timer is not None:
+                window.after_cancel(timer)
+        worker.stop()
 
-            if time_diff < 0:
-                messagebox.showwarning("Overdue", f"Task '{t['name']}' is OVERDUE!")
-            elif 0 <= time_diff <= 60:
-                messagebox.showinfo("Due Now", f"Task '{t['name']}' is ALMOST DUE!")
-            elif 0 < time_diff <= 10800:
-                mins = int(time_diff // 60)
-                messagebox.showinfo("Almost Due", f"'{t['name']}' is almost due!\n{mins} mins left.")
+    window.bind("<Destroy>", _cancel_timers, add="+")
 
-        window.after(60000, check_notifications)
     # ------------------ BUTTON ------------------
     add_btn = tk.Button(input_frame, text="Add Task", bg=PRIMARY, fg="white", width=20, font=("Segoe UI", 13), command=add_task)
-    add_btn.grid(row=9, column=0, columnspan=2, pady=15)
+    add_btn.grid(row=11, column=0, columnspan=2, pady=15)
+
+    # ------------------ SEARCH BAR ------------------
+    search_frame = tk.Frame(center, bg=BG)
+    search_frame.pack(pady=(20, 0))
+
+    def search_field(column, text, width):
+        tk.Label(search_frame, text=text, bg=BG, font=("Segoe UI", 12)).grid(row=0, column=column, padx=(10, 4))
+        entry = tk.Entry(search_frame, width=width, font=("Segoe UI", 12))
+        entry.grid(row=0, column=column + 1)
+        entry.bind("<KeyRelease>", schedule_search)
+        return entry
+
+    def search_choice(column, text, values):
+        tk.Label(search_frame, text=text, bg=BG, font=("Segoe UI", 12)).grid(row=0, column=column, padx=(10, 4))
+        var = tk.StringVar(value=values[0])
+        combo = ttk.Combobox(search_frame, values=values, textvariable=var, state="readonly",
+                             width=10, font=("Segoe UI", 12))
+        combo.grid(row=0, column=column + 1)
+        combo.bind("<<ComboboxSelected>>", schedule_search)
+        return var
+
+    search_entry = search_field(0, "Search:", 24)
+    search_term_var = search_choice(2, "Term:", ("All",) + TERM_OPTIONS)
+    search_section_entry = search_field(4, "Section:", 8)
+    search_course_entry = search_field(6, "Course:", 8)
+    search_year_entry = search_field(8, "Year:", 4)
+    search_status_var = search_choice(10, "Status:", ("All", "Pending", "Completed"))
+    tk.Button(search_frame, text="Clear", bg=INFO, fg="white", width=8,
+              command=clear_search).grid(row=0, column=12, padx=10)
+    search_info = tk.Label(center, text="", bg=BG, fg="#444", font=("Segoe UI", 11))
+    search_info.pack()
 
     # ------------------ TABLE ------------------
     style = ttk.Style()
     style.configure("Treeview", rowheight=30)
 
     columns = ("Name", "Subject", "Section", "Course", "Year", "Instructor", "Term", "Deadline", "Status")
-    task_list = ttk.Treeview(center, columns=columns,
+    table_frame = tk.Frame(center, bg=BG)
+    table_frame.pack(pady=(5, 20))
+    task_list = ttk.Treeview(table_frame, columns=columns,
                              show="headings", height=12)
     headings = {
         "Name": "Task/Event",
@@ -716,7 +1840,10 @@ def open_main_window():
     for col in columns:
         task_list.heading(col, text=headings[col])
         task_list.column(col, width=140 if col not in {"Term", "Status"} else 100, anchor="center")
-    task_list.pack(pady=20)
+    task_list.pack(side="left")
+    table_scroll = ttk.Scrollbar(table_frame, orient="vertical", command=task_list.yview)
+    table_scroll.pack(side="right", fill="y")
+    task_list.configure(yscrollcommand=on_table_scroll)
 
     # ------------------ CONTROLS ------------------
     controls = tk.Frame(center, bg=BG)
@@ -730,6 +1857,28 @@ def open_main_window():
     delete_btn.grid(row=0, column=2, padx=10)
     export_btn = tk.Button(controls, text="Export", bg=WARNING, fg="white", width=17, command=export_csv)
     export_btn.grid(row=0, column=3, padx=10)
+    import_btn = tk.Button(controls, text="Import", bg=TEAL, fg="white", width=17, command=import_csv)
+    import_btn.grid(row=0, column=4, padx=10)
+    enroll_btn = tk.Button(controls, text="Enrollments", bg=INFO, fg="white", width=17,
+                           command=manage_enrollments)
+    enroll_btn.grid(row=0, column=5, padx=10)
+    archive_btn = tk.Button(controls, text="Archive", bg=WARNING, fg="white", width=17, command=manage_archive)
+    archive_btn.grid(row=0, column=6, padx=10)
+    if current_role == "admin":
+        tk.Button(controls, text="Diagnostics", bg=TEAL, fg="white", width=17,
+                  command=open_diagnostics).grid(row=0, column=7, padx=10)
+
+    tk.Button(digest_frame, text="Snooze 1h", bg=WARNING, fg="white", width=12,
+              command=snooze_alerts).grid(row=0, column=1, padx=5)
+    tk.Button(digest_frame, text="Acknowledge", bg=INFO, fg="white", width=12,
+              command=acknowledge_alerts).grid(row=0, column=2, padx=5)
+    tk.Button(digest_frame, text="Dismiss All", bg=DANGER, fg="white", width=12,
+              command=dismiss_all_alerts).grid(row=0, column=3, padx=5)
+    digest_list.bind("<Double-1>", show_alert_task)
+
+    io_status = tk.Label(center, text="", bg=BG, fg="#444", font=("Segoe UI", 11))
+    io_status.pack()
+    export_progress = ttk.Progressbar(center, orient="horizontal", length=400, mode="determinate", maximum=100)
 
     manage_entries = [
         task_name_entry,
@@ -740,6 +1889,7 @@ def open_main_window():
         instructor_entry,
         date_entry,
         time_entry,
+        until_entry,
     ]
 
     if not can_manage:
@@ -747,24 +1897,41 @@ def open_main_window():
                           text="Student mode: you may only mark assigned tasks as completed.",
                           bg=BG, fg="#444", font=("Segoe UI", 12, "italic"))
         notice.pack()
+
+        def show_enrollment_notice(rows):
+            if not rows:
+                notice.config(text="Student mode: you are not enrolled in any section yet, "
+                                   "so no tasks are assigned to you.")
+
+        worker.submit(db.fetch_enrollments, current_user, on_done=show_enrollment_notice)
         for widget in manage_entries:
             widget.configure(state="disabled")
         term_combo.configure(state="disabled")
+        repeat_combo.configure(state="disabled")
         add_btn.configure(state="disabled")
         edit_btn.configure(state="disabled")
         delete_btn.configure(state="disabled")
         export_btn.configure(state="disabled")
+        import_btn.configure(state="disabled")
+        enroll_btn.configure(state="disabled")
+        archive_btn.configure(state="disabled")
     else:
         term_combo.configure(state="readonly")
+        repeat_combo.configure(state="readonly")
 
+    start_metrics_file()
     load_tasks_from_db()
-    check_notifications()
 
     window.mainloop()
 
 # START PROGRAM
-init_db()
-load_users()
-
 if __name__ == "__main__":
+    metrics.configure_from_env()
+    if os.environ.get("SCHEDULE_SERVER"):
+        # thin client: the same db calls go over HTTP to schedule_server.py
+        schedule_client.set_server_url(os.environ["SCHEDULE_SERVER"])
+        # the worker closes the backend it ran on, so it must not touch the
+        # local SQLite file here
+        db = schedule_csv.db = schedule_worker.db = schedule_client
+    db.init_db()
     open_login_window()
\ No newline at end of file
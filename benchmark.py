@@ -0,0 +1,284 @@
+# Student Schedule Reminder - benchmarks
+# Builds synthetic schedule databases and times the app's hot paths without
+# opening a window, writing the results as JSON so runs can be compared:
+#   python benchmark.py --sizes 1000,10000 --output before.json
+#   python benchmark.py --data-dir bench_data --repeat 5
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import schedule_csv
+import schedule_db as db
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+INSERT_BATCH_SIZE = 5000
+APP_PATH = Path(__file__).with_name("Simple Student Schedule Reminder.py")
+
+SUBJECTS = (
+    "Mathematics", "Physics", "Chemistry", "Biology", "English", "Filipino", "History",
+    "Programming", "Data Structures", "Databases", "Networking", "Web Development",
+    "Statistics", "Ethics", "Physical Education",
+)
+COURSES = ("BSIT", "BSCS", "BSIS", "BSEMC")
+YEAR_LEVELS = ("1", "2", "3", "4")
+SECTION_LETTERS = "ABCDE"
+TERMS = ("Prelim", "Midterm", "Prefinals", "Finals")
+TASK_KINDS = ("Quiz", "Assignment", "Lab Activity", "Project", "Exam", "Reading", "Essay", "Reflection")
+INSTRUCTORS = (
+    "Prof Cruz", "Prof Santos", "Prof Reyes", "Prof Garcia", "Prof Mendoza", "Prof Torres",
+    "Prof Ramos", "Prof Flores", "Prof Aquino", "Prof Villanueva", "Prof Bautista", "Prof Castillo",
+)
+# tasks spread from a semester back to a semester ahead of today
+DEADLINE_SPREAD_DAYS = 120
+BENCH_STUDENT = "student"
+
+
+# ---------------------------------------------
+# SYNTHETIC DATA
+# ---------------------------------------------
+def generate_tasks(count, seed=0):
+    # yields rows in db.insert_tasks order; the same seed gives the same data
+    rng = random.Random(seed)
+    now = int(time.time())
+    spread = DEADLINE_SPREAD_DAYS * 86400
+    for number in range(1, count + 1):
+        course = rng.choice(COURSES)
+        year_level = rng.choice(YEAR_LEVELS)
+        section = f"{course}-{year_level}{rng.choice(SECTION_LETTERS)}"
+        # deadlines land on the quarter hour like the ones people type in
+        deadline_ts = (now + rng.randint(-spread, spread)) // 900 * 900
+        deadline = datetime.datetime.fromtimestamp(deadline_ts).strftime(db.DEADLINE_FORMATS[0])
+        # most past work is handed in; a few stragglers stay pending
+        if deadline_ts < now:
+            status = "Completed" if rng.random() < 0.9 else "Pending"
+        else:
+            status = "Completed" if rng.random() < 0.1 else "Pending"
+        yield (
+            f"{rng.choice(TASK_KINDS)} {number}", rng.choice(SUBJECTS), section, course, year_level,
+            rng.choice(INSTRUCTORS), rng.choice(TERMS), deadline, status, deadline_ts,
+        )
+
+
+def build_database(path, count, seed=0):
+    # returns the seconds spent in db.insert_tasks
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(f"{path}{suffix}"):
+            os.remove(f"{path}{suffix}")
+    db.set_db_path(path)
+    db.init_db()
+    rows = generate_tasks(count, seed)
+    elapsed = 0.0
+    while True:
+        batch = [row for _, row in zip(range(INSERT_BATCH_SIZE), rows)]
+        if not batch:
+            break
+        started = time.perf_counter()
+        db.insert_tasks(batch)
+        elapsed += time.perf_counter() - started
+    for course in COURSES[:2]:
+        db.enroll_user(BENCH_STUDENT, f"{course}-1A", course, "1")
+    return elapsed
+
+
+def stored_task_count(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+def load_app():
+    # the GUI module only defines things at import time, but it needs tkinter
+    try:
+        spec = importlib.util.spec_from_file_location("schedule_app", APP_PATH)
+        app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(app)
+        return app
+    except ImportError:
+        return None
+
+
+# ---------------------------------------------
+# HOT PATHS
+# ---------------------------------------------
+# each mirrors the reads open_main_window hands to its worker thread
+def load_tasks(app, username):
+    if db.count_tasks(username)[0] <= app.VIRTUAL_TABLE_THRESHOLD:
+        return len(db.fetch_all_tasks(username))
+    today = int(datetime.datetime.combine(datetime.date.today(), datetime.time()).timestamp())
+    page = db.fetch_task_page(after=(today, 0), limit=app.TABLE_WINDOW_ROWS + 1, username=username)
+    if not page:
+        page = db.fetch_task_page(before=(today, 0), limit=app.TABLE_WINDOW_ROWS, username=username)
+    return len(page)
+
+
+def warm_start(username):
+    # later GUI starts: the snapshot saved after a full load, validated and read back
+    tasks = db.load_task_snapshot(username)
+    return len(tasks) if tasks is not None else 0
+
+
+def update_dashboard(username):
+    total = db.count_tasks(username)
+    for dimension in db.SUMMARY_DIMENSIONS:
+        db.fetch_task_summary(dimension, username)
+    return total[0]
+
+
+def notification_scan(username, scope):
+    pending = db.fetch_pending_deadlines(None, None, scope)
+    db.fetch_notification_state(username)
+    return len(pending)
+
+
+def due_notifications(username):
+    now = int(time.time())
+    return len(db.fetch_due_notifications(username, now, now - 86400, username))
+
+
+def reopen_database():
+    db.close_connection()
+    db.init_db()
+
+
+def export_csv(path):
+    return schedule_csv.export_tasks_csv(path)
+
+
+def time_call(func, args, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return timings, result
+
+
+def record(results, size, step, timings, rows=None):
+    entry = {
+        "tasks": size,
+        "step": step,
+        "runs": len(timings),
+        "best_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+    }
+    if rows is not None:
+        entry["rows"] = rows
+    results.append(entry)
+    print(f"{size:>9} {step:<24} {entry['best_s'] * 1000:>11.2f} ms {entry['median_s'] * 1000:>11.2f} ms"
+          + (f"  ({rows} rows)" if rows is not None else ""))
+
+
+def run_size(app, data_dir, size, repeat, seed, results):
+    path = os.path.join(data_dir, f"bench_{size}.db")
+    if stored_task_count(path) != size:
+        elapsed = build_database(path, size, seed)
+        record(results, size, "bulk_insert", [elapsed], size)
+    db.set_db_path(path)
+
+    timings, _ = time_call(reopen_database, (), repeat)
+    record(results, size, "init_db", timings)
+    # password hashing dominates a login; the cached lookup is what the app repeats
+    timings, _ = time_call(db.authenticate, ("admin", db.DEFAULT_USERS["admin"]["password"]), repeat)
+    record(results, size, "login", timings)
+    timings, _ = time_call(db.fetch_user, ("admin",), repeat)
+    record(results, size, "fetch_user", timings)
+    if app is not None:
+        for label, username in (("admin", None), ("student", BENCH_STUDENT)):
+            timings, rows = time_call(load_tasks, (app, username), repeat)
+            record(results, size, f"load_tasks_{label}", timings, rows)
+            if rows and db.count_tasks(username)[0] <= app.VIRTUAL_TABLE_THRESHOLD:
+                db.save_task_snapshot(db.fetch_all_tasks(username), username)
+                timings, rows = time_call(warm_start, (username,), repeat)
+                record(results, size, f"warm_start_{label}", timings, rows)
+    for label, username in (("admin", None), ("student", BENCH_STUDENT)):
+        timings, rows = time_call(update_dashboard, (username,), repeat)
+        record(results, size, f"update_dashboard_{label}", timings, rows)
+    timings, rows = time_call(notification_scan, ("admin", None), repeat)
+    record(results, size, "notification_scan", timings, rows)
+    timings, rows = time_call(due_notifications, (BENCH_STUDENT,), repeat)
+    record(results, size, "due_notifications", timings, rows)
+    timings, rows = time_call(export_csv, (os.path.join(data_dir, f"bench_{size}.csv"),), repeat)
+    record(results, size, "csv_export", timings, rows)
+    db.close_connection()
+
+
+# ---------------------------------------------
+# MAIN
+# ---------------------------------------------
+def parse_sizes(text):
+    sizes = [int(part) for part in text.split(",") if part.strip()]
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("sizes must be positive task counts, e.g. 1000,10000")
+    return sizes
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="benchmark", description="Time the schedule app's hot paths.")
+    parser.add_argument("--sizes", type=parse_sizes, default=list(DEFAULT_SIZES),
+                        help="comma separated task counts (default 1000,10000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per step; best and median are kept")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generated tasks")
+    parser.add_argument("--data-dir", help="keep generated databases here and reuse them on later runs")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    app = load_app()
+    if app is None:
+        print("tkinter is not available; skipping load_tasks.", file=sys.stderr)
+
+    results = []
+    temp_dir = None
+    data_dir = args.data_dir
+    if data_dir:
+        os.makedirs(data_dir, exist_ok=True)
+    else:
+        temp_dir = tempfile.TemporaryDirectory(prefix="schedule_bench_")
+        data_dir = temp_dir.name
+    try:
+        print(f"{'tasks':>9} {'step':<24} {'best':>14} {'median':>14}")
+        for size in args.sizes:
+            run_size(app, data_dir, size, max(args.repeat, 1), args.seed, results)
+    finally:
+        db.close_connection()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "schema_version": db.SCHEMA_VERSION,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as out:
+        json.dump(report, out, indent=2)
+    print(f"Wrote {len(results)} timings to {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# Student Schedule Reminder - command line tools
+# Runs without Tk, so it works from cron and on servers with no display:
+#   python schedule_cli.py due --hours 48
+#   python schedule_cli.py notify --user student
+import argparse
+import csv
+import datetime
+import getpass
+import sqlite3
+import sys
+import time
+
+import schedule_csv
+import schedule_db as db
+
+ROLES = ("student", "instructor", "admin")
+# like the app, a recurring occurrence counts as overdue for this many days
+OCCURRENCE_PAST_DAYS = 14
+
+
+def parse_day(text, end_of_day=False):
+    day = datetime.datetime.strptime(text, "%Y-%m-%d")
+    if end_of_day:
+        # inclusive: everything before midnight after the given day
+        return int((day + datetime.timedelta(days=1)).timestamp()) - 1
+    return int(day.timestamp())
+
+
+def print_task(task, label=None):
+    prefix = f"{label:<11} " if label else ""
+    print(f"{prefix}{task['deadline']:<20} {task['name']} ({task['subject']}, {task['section']})")
+
+
+# ---------------------------------------------
+# COMMANDS
+# ---------------------------------------------
+def cmd_import(args):
+    imported, skipped = schedule_csv.import_tasks_csv(args.file)
+    print(f"Imported {imported} tasks ({skipped} rows skipped).")
+    return 0
+
+
+def cmd_export(args):
+    filters = {
+        "term": args.term,
+        "section": args.section,
+        "course": args.course,
+        "year_level": args.year_level,
+        "status": args.status,
+        "include_archive": args.include_archive,
+    }
+    if args.due_from:
+        filters["deadline_from"] = parse_day(args.due_from)
+    if args.due_until:
+        filters["deadline_to"] = parse_day(args.due_until, end_of_day=True)
+    count = schedule_csv.export_tasks_csv(args.file, filters, compress=args.gzip or args.file.endswith(".gz"))
+    print(f"Exported {count} tasks to {args.file}.")
+    return 0
+
+
+def cmd_due(args):
+    now = int(time.time())
+    start = None if args.overdue else now
+    end = now + int(args.hours * 3600)
+    window = (now - OCCURRENCE_PAST_DAYS * 86400, end)
+    tasks = db.fetch_due_tasks(start, end, args.user, window)
+    for task in tasks:
+        print_task(task, "Overdue" if task["deadline_ts"] < now else None)
+    if not tasks:
+        print("No pending tasks due.")
+    return 0
+
+
+def cmd_notify(args):
+    # prints nothing when nothing is due, so cron only mails when it matters
+    now = int(time.time())
+    start = now - int(args.lookback * 3600)
+    if args.record:
+        # only what this user has not been told about yet, then remember it
+        due = db.fetch_due_notifications(args.user, now, start, args.user, (start, now + db.REMINDER_STAGES[0][0]))
+        for task, stage in due:
+            print_task(task, db.REMINDER_STAGES[stage][1])
+        db.record_notifications(args.user, [(task["id"], stage, task["deadline_ts"]) for task, stage in due], now)
+        return 0
+    end = now + db.REMINDER_STAGES[0][0]
+    for task in db.fetch_due_tasks(start, end, args.user, (start, end)):
+        stage = db.reminder_stage(task["deadline_ts"], now)
+        if stage is not None:
+            print_task(task, db.REMINDER_STAGES[stage][1])
+    return 0
+
+
+def cmd_users(args):
+    if args.action == "list":
+        for username, info in sorted(db.fetch_users().items()):
+            print(f"{username:<16} {info['role']:<11} {info['fullname']}")
+        return 0
+    if args.action == "add":
+        password = args.password or getpass.getpass(f"Password for {args.username}: ")
+        if not password:
+            print("A password is required.", file=sys.stderr)
+            return 1
+        try:
+            db.add_user(args.username, password, args.fullname or args.username, args.role)
+        except sqlite3.IntegrityError:
+            print(f"User '{args.username}' already exists.", file=sys.stderr)
+            return 1
+        print(f"Added {args.role} '{args.username}'.")
+        return 0
+    if not db.delete_user(args.username):
+        print(f"No user named '{args.username}'.", file=sys.stderr)
+        return 1
+    print(f"Removed '{args.username}'.")
+    return 0
+
+
+def cmd_enroll(args):
+    if args.action == "list":
+        for section, course, year_level in db.fetch_enrollments(args.username):
+            print(f"{section:<12} {course:<12} {year_level}")
+        return 0
+    if db.fetch_user(args.username) is None:
+        print(f"No user named '{args.username}'.", file=sys.stderr)
+        return 1
+    if args.action == "add":
+        db.enroll_user(args.username, args.section, args.course, args.year_level)
+        print(f"Enrolled '{args.username}' in {args.section} {args.course} {args.year_level}.")
+    else:
+        db.unenroll_user(args.username, args.section, args.course, args.year_level)
+        print(f"Removed '{args.username}' from {args.section} {args.course} {args.year_level}.")
+    return 0
+
+
+def cmd_archive(args):
+    if args.action == "list":
+        counts = db.fetch_archive_counts()
+        for term, count in counts:
+            print(f"{term:<12} {count}")
+        if not counts:
+            print("The archive is empty.")
+        return 0
+    if args.action == "restore":
+        print(f"Restored {db.restore_archived_tasks(args.term)} tasks.")
+        return 0
+    completed_before = None
+    if args.completed_days is not None:
+        completed_before = int(time.time() - args.completed_days * 86400)
+    if not args.term and completed_before is None:
+        print("Give --term and/or --completed-days.", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        print(f"{db.count_archivable_tasks(args.term or (), completed_before)} tasks would be archived.")
+        return 0
+    moved = db.archive_tasks(args.term or (), completed_before)
+    print(f"Archived {moved} tasks to {db.archive_path().name}.")
+    return 0
+
+
+# ---------------------------------------------
+# ARGUMENTS
+# ---------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="schedule_cli", description="Student Schedule Reminder tools.")
+    parser.add_argument("--db", help="path to schedule.db (default: next to this script)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import", help="import tasks from a CSV file")
+    command.add_argument("file")
+    command.set_defaults(func=cmd_import)
+
+    command = commands.add_parser("export", help="export stored tasks to a CSV file; recurring "
+                                  "occurrences are only included once they are completed or edited")
+    command.add_argument("file")
+    command.add_argument("--term")
+    command.add_argument("--section")
+    command.add_argument("--course")
+    command.add_argument("--year-level")
+    command.add_argument("--status", choices=("Pending", "Completed"))
+    command.add_argument("--due-from", metavar="YYYY-MM-DD")
+    command.add_argument("--due-until", metavar="YYYY-MM-DD")
+    command.add_argument("--gzip", action="store_true", help="compress the output")
+    command.add_argument("--include-archive", action="store_true", help="also export archived tasks")
+    command.set_defaults(func=cmd_export)
+
+    command = commands.add_parser("due", help="list pending tasks due soon")
+    command.add_argument("--hours", type=float, default=24, help="look this many hours ahead (default 24)")
+    command.add_argument("--overdue", action="store_true", help="include tasks already past their deadline")
+    command.add_argument("--user", help="only tasks for this student's enrollments")
+    command.set_defaults(func=cmd_due)
+
+    command = commands.add_parser("notify", help="print the reminders that are due now")
+    command.add_argument("--lookback", type=float, default=24,
+                         help="report tasks that went overdue in the last N hours (default 24)")
+    command.add_argument("--user", help="only tasks for this student's enrollments")
+    command.add_argument("--record", action="store_true",
+                         help="skip reminders --user was already shown, and mark these as shown")
+    command.set_defaults(func=cmd_notify)
+
+    command = commands.add_parser("users", help="list, add or remove accounts")
+    actions = command.add_subparsers(dest="action", required=True)
+    actions.add_parser("list")
+    action = actions.add_parser("add")
+    action.add_argument("username")
+    action.add_argument("--fullname")
+    action.add_argument("--role", choices=ROLES, default="student")
+    action.add_argument("--password", help="prompted for when omitted")
+    action = actions.add_parser("remove")
+    action.add_argument("username")
+    command.set_defaults(func=cmd_users)
+
+    command = commands.add_parser("enroll", help="manage a student's section enrollments")
+    actions = command.add_subparsers(dest="action", required=True)
+    action = actions.add_parser("list")
+    action.add_argument("username")
+    for name in ("add", "remove"):
+        action = actions.add_parser(name)
+        action.add_argument("username")
+        action.add_argument("section")
+        action.add_argument("course")
+        action.add_argument("year_level")
+    command.set_defaults(func=cmd_enroll)
+
+    command = commands.add_parser("archive", help="move finished tasks out of the live table")
+    actions = command.add_subparsers(dest="action", required=True)
+    actions.add_parser("list", help="archived tasks per term")
+    action = actions.add_parser("run", help="archive whole terms and/or old completed tasks")
+    action.add_argument("--term", action="append", help="a finished term; may be repeated")
+    action.add_argument("--completed-days", type=float, metavar="DAYS",
+                        help="also archive completed tasks due more than DAYS ago")
+    action.add_argument("--dry-run", action="store_true", help="only count what would move")
+    action = actions.add_parser("restore", help="move a term's archived tasks back")
+    action.add_argument("--term", action="append", required=True)
+    command.set_defaults(func=cmd_archive)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "record", False) and not args.user:
+        parser.error("--record needs --user")
+    if args.db:
+        db.set_db_path(args.db)
+    if args.command == "export":
+        try:
+            if args.due_from:
+                parse_day(args.due_from)
+            if args.due_until:
+                parse_day(args.due_until)
+        except ValueError:
+            parser.error("dates must follow YYYY-MM-DD")
+    try:
+        db.init_db()
+        return args.func(args)
+    except (OSError, UnicodeDecodeError, csv.Error) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
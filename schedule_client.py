@@ -0,0 +1,394 @@
+# Student Schedule Reminder - client for schedule_server.py
+# Same function names, arguments and return shapes as schedule_db, so code
+# written against `db` runs as a thin client by swapping the module:
+#   schedule_client.set_server_url("http://127.0.0.1:8765")
+#   db = schedule_client
+# Cached task reads send If-None-Match and reuse the last response on a 304;
+# writes go through the server's /batch endpoint, several at a time with batch().
+import http.client
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, urlencode, urlsplit
+
+import schedule_metrics as metrics
+# constants and helpers re-exported so this module can stand in for schedule_db
+from schedule_db import (DEADLINE_FORMATS, FILTER_COLUMNS, REMINDER_STAGES, SCHEMA_VERSION, SUMMARY_DIMENSIONS,
+                         TASK_COLUMNS, TaskRecord, deadline_timestamp, is_occurrence_id, parse_deadline,
+                         reminder_stage, split_occurrence_id)
+
+SERVER_URL = "http://127.0.0.1:8765"
+REQUEST_TIMEOUT = 30
+# reopen connections idle longer than this; the server drops them after 60s
+IDLE_RECONNECT_SECONDS = 30
+ETAG_CACHE_SIZE = 64
+# task ids per /tasks?ids= request, keeping URLs short
+ID_CHUNK_SIZE = 200
+
+_local = threading.local()
+_token = None
+# request target -> (etag, decoded payload), most recently used last
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+class ServerError(Exception):
+    # status 0 means the server could not be reached at all
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.results = []
+
+
+# ---------------------------------------------
+# CONNECTION
+# ---------------------------------------------
+def set_server_url(url):
+    global SERVER_URL, _token
+    close_connection()
+    SERVER_URL = url.rstrip("/")
+    _token = None
+    clear_cache()
+
+
+def get_connection():
+    # one keep-alive connection per thread, like schedule_db's sqlite connections
+    conn = getattr(_local, "conn", None)
+    if conn is not None and time.monotonic() - _local.used > IDLE_RECONNECT_SECONDS:
+        conn.close()
+        conn = None
+    if conn is None:
+        parts = urlsplit(SERVER_URL)
+        if parts.scheme != "http":
+            raise ServerError(0, f"Unsupported server URL: {SERVER_URL}")
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=REQUEST_TIMEOUT)
+        _local.conn = conn
+    _local.used = time.monotonic()
+    return conn
+
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def clear_cache():
+    with _etag_lock:
+        _etag_cache.clear()
+
+
+def build_target(path, params):
+    query = urlencode({name: value for name, value in params.items() if value is not None and value != ""})
+    return f"{path}?{query}" if query else path
+
+
+def request(method, target, payload=None, etag=None):
+    # returns (status, etag, decoded body); a GET is retried once on a fresh
+    # connection, other methods never are since they may have been applied
+    body = None if payload is None else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {"Accept": "application/json"}
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+    if _token:
+        headers["Authorization"] = f"Bearer {_token}"
+    if etag:
+        headers["If-None-Match"] = etag
+    attempts = 2 if method == "GET" else 1
+    for attempt in range(attempts):
+        conn = get_connection()
+        try:
+            conn.request(method, urlsplit(SERVER_URL).path + target, body, headers)
+            response = conn.getresponse()
+            data = response.read()
+            break
+        except (http.client.HTTPException, OSError) as exc:
+            close_connection()
+            if attempt + 1 == attempts:
+                raise ServerError(0, f"Cannot reach the schedule server at {SERVER_URL}: {exc}") from exc
+    if (response.getheader("Connection") or "").lower() == "close":
+        close_connection()
+    decoded = json.loads(data) if data else None
+    if response.status >= 400:
+        message = decoded.get("error") if isinstance(decoded, dict) else None
+        raise ServerError(response.status, message or f"HTTP {response.status} from {target}")
+    return response.status, response.getheader("ETag"), decoded
+
+
+def get(path, **params):
+    return request("GET", build_target(path, params))[2]
+
+
+def get_cached(path, **params):
+    # revalidates the last response for the same URL instead of downloading it again
+    target = build_target(path, params)
+    with _etag_lock:
+        cached = _etag_cache.get(target)
+    status, etag, payload = request("GET", target, etag=cached[0] if cached else None)
+    if status == 304 and cached is not None:
+        metrics.count("api cache hits")
+        return cached[1]
+    if etag:
+        with _etag_lock:
+            _etag_cache[target] = (etag, payload)
+            _etag_cache.move_to_end(target)
+            while len(_etag_cache) > ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+    return payload
+
+
+def get_or_none(path, **params):
+    try:
+        return get(path, **params)
+    except ServerError as exc:
+        if exc.status == 404:
+            return None
+        raise
+
+
+def batch(ops):
+    # ops: (name, args) pairs sent in one request and run in order; returns
+    # their results. If one fails, the ones before it stay applied and the
+    # ServerError raised carries their results.
+    payload = {"ops": [{"op": name, "args": list(args)} for name, args in ops]}
+    result = request("POST", "/batch", payload)[2]
+    error = result.get("error")
+    if error:
+        exc = ServerError(error["status"], error["message"])
+        exc.results = result["results"]
+        raise exc
+    return result["results"]
+
+
+def write(name, *args):
+    return batch([(name, args)])[0]
+
+
+def init_db():
+    # the server owns the schema; only check that both sides agree on it
+    status = get("/status")
+    if status["schema_version"] != SCHEMA_VERSION or tuple(status["columns"]) != TASK_COLUMNS:
+        raise ServerError(0, f"The server uses schema version {status['schema_version']}, "
+                             f"this client expects {SCHEMA_VERSION}.")
+
+# ---------------------------------------------
+# USERS
+# ---------------------------------------------
+def authenticate(username, password):
+    global _token
+    clear_cache()
+    try:
+        result = request("POST", "/login", {"username": username, "password": password})[2]
+    except ServerError as exc:
+        if exc.status == 401:
+            _token = None
+            return None
+        raise
+    _token = result["token"]
+    return result["user"]
+
+
+def fetch_user(username):
+    return get_or_none(f"/users/{quote(username, safe='')}")
+
+
+def fetch_usernames(prefix="", role=None, limit=50):
+    return get("/users", prefix=prefix, role=role, limit=limit)
+
+
+def fetch_enrollments(username):
+    return [tuple(row) for row in get(f"/users/{quote(username, safe='')}/enrollments")]
+
+
+def enroll_user(username, section, course, year_level):
+    write("enroll_user", username, section, course, year_level)
+
+
+def unenroll_user(username, section, course, year_level):
+    write("unenroll_user", username, section, course, year_level)
+
+# ---------------------------------------------
+# TASKS
+# ---------------------------------------------
+def tasks_from_rows(rows):
+    # fresh records on every call; cached payloads are never handed out to be mutated
+    return [TaskRecord(*row) for row in rows]
+
+
+def page_key(key):
+    if key is None:
+        return None
+    deadline_ts, task_id = key
+    return f"{'' if deadline_ts is None else deadline_ts},{task_id}"
+
+
+def window_param(window):
+    return None if window is None else f"{window[0]},{window[1]}"
+
+
+def fetch_task(task_id):
+    row = get_or_none(f"/tasks/{int(task_id)}")
+    return TaskRecord(*row) if row else None
+
+
+def fetch_tasks(task_ids):
+    task_ids = list(task_ids)
+    tasks = []
+    for start in range(0, len(task_ids), ID_CHUNK_SIZE):
+        chunk = task_ids[start:start + ID_CHUNK_SIZE]
+        tasks.extend(tasks_from_rows(get("/tasks", ids=",".join(str(task_id) for task_id in chunk))))
+    return tasks
+
+
+def fetch_all_tasks(username=None, window=None):
+    return tasks_from_rows(get_cached("/tasks", username=username, window=window_param(window)))
+
+
+def fetch_task_page(after=None, before=None, limit=100, username=None, window=None):
+    return tasks_from_rows(get_cached("/tasks/page", after=page_key(after), before=page_key(before),
+                                      limit=limit, username=username, window=window_param(window)))
+
+
+def count_tasks(username=None, window=None):
+    return tuple(get_cached("/tasks/counts", username=username, window=window_param(window)))
+
+
+def fetch_task_summary(dimension, username=None, window=None):
+    return [tuple(row) for row in get_cached(f"/tasks/summary/{quote(dimension, safe='')}",
+                                             username=username, window=window_param(window))]
+
+
+def latest_task_change():
+    return get("/tasks/latest")["seq"]
+
+
+def data_version():
+    # stands in for PRAGMA data_version. It moves on every task write, ours
+    # included, so a sync poll may fetch our own edits back; applying them
+    # a second time changes nothing.
+    return latest_task_change()
+
+
+def fetch_task_changes(since_seq, username=None):
+    changes = get("/tasks/changes", since=since_seq, username=username)
+    if changes.get("reset"):
+        return None
+    return changes["seq"], tasks_from_rows(changes["changed"]), set(changes["deleted"])
+
+
+def fetch_pending_deadlines(start_ts=None, end_ts=None, username=None, window=None):
+    return [tuple(row) for row in get_cached("/tasks/pending", start=start_ts, end=end_ts, username=username,
+                                             window=window_param(window))]
+
+
+def filter_params(filters):
+    params = {column: filters.get(column) for column in FILTER_COLUMNS}
+    params["deadline_from"] = filters.get("deadline_from")
+    params["deadline_to"] = filters.get("deadline_to")
+    params["include_archive"] = 1 if filters.get("include_archive") else None
+    return params
+
+
+def search_tasks(text="", filters=None, offset=0, limit=100):
+    filters = filters or {}
+    return tasks_from_rows(get_cached("/tasks/search", q=text, offset=offset, limit=limit,
+                                      username=filters.get("enrolled_user"), **filter_params(filters)))
+
+
+def count_matching_tasks(filters):
+    return get("/tasks/export", count=1, **filter_params(filters))["count"]
+
+
+def iter_task_batches(filters, batch_size=5000):
+    # keyset pages by id, so no server cursor stays open between requests
+    after_id = 0
+    while True:
+        rows = get("/tasks/export", after_id=after_id, limit=batch_size, **filter_params(filters))
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+        if len(rows) < batch_size:
+            break
+        after_id = rows[-1][0]
+
+
+def insert_task(task):
+    return write("insert_task", dict(task.items()))
+
+
+def insert_tasks(rows):
+    write("insert_tasks", [list(row) for row in rows])
+
+
+def update_task(task_id, fields, expected_version=None):
+    return write("update_task", task_id, dict(fields), expected_version)
+
+
+def set_task_status(task_id, status):
+    write("set_task_status", task_id, status)
+
+
+def delete_task(task_id):
+    write("delete_task", task_id)
+
+
+def insert_series(series):
+    return write("insert_series", dict(series))
+
+
+def materialize_occurrence(task_id, fields):
+    row = write("materialize_occurrence", task_id, dict(fields))
+    return TaskRecord(*row) if row else None
+
+
+def delete_series(series_id):
+    write("delete_series", series_id)
+
+# the server's ETag revalidation already makes a repeated load cheap, so
+# thin clients keep no snapshot
+def load_task_snapshot(username=None, window=None, seq=None):
+    return None
+
+
+def save_task_snapshot(tasks, username=None, window=None, seq=None):
+    pass
+
+# ---------------------------------------------
+# ARCHIVE
+# ---------------------------------------------
+def fetch_archive_counts():
+    return [tuple(row) for row in get("/archive")]
+
+
+def count_archivable_tasks(terms=(), completed_before=None):
+    return get("/archive/preview", terms=",".join(terms), completed_before=completed_before)["count"]
+
+
+def archive_tasks(terms=(), completed_before=None):
+    return write("archive_tasks", list(terms), completed_before)
+
+
+def restore_archived_tasks(terms):
+    return write("restore_archived_tasks", list(terms))
+
+# ---------------------------------------------
+# NOTIFICATIONS
+# ---------------------------------------------
+# the server always uses the logged-in account; username is kept so the
+# signatures match schedule_db
+def fetch_notification_state(username):
+    return {row[0]: (row[1], row[2], bool(row[3])) for row in get("/notifications")}
+
+
+def record_notifications(username, shown, now):
+    write("record_notifications", [list(item) for item in shown], now)
+
+
+def snooze_notifications(username, task_ids, until_ts):
+    write("snooze_notifications", list(task_ids), until_ts)
+
+
+def acknowledge_notifications(username, task_ids):
+    write("acknowledge_notifications", list(task_ids))
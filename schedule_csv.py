@@ -0,0 +1,95 @@
+# Student Schedule Reminder - CSV import/export
+import csv
+import gzip
+import itertools
+
+import schedule_db as db
+
+IMPORT_BATCH_SIZE = 5000
+EXPORT_BATCH_SIZE = 5000
+EXPORT_HEADER = ["Name", "Subject", "Section", "Course", "Year", "Instructor", "Term", "Deadline", "Status"]
+
+
+def normalize_import_row(row, deadline_cache):
+    # accepts the 4-column layout of sample.csv and the 9-column export layout
+    row = [value.strip() for value in row]
+    if len(row) == 9:
+        name, subject, section, course, year_level, instructor, term, deadline, status = row
+    elif len(row) == 4:
+        name, subject, deadline, status = row
+        section = course = year_level = instructor = ""
+        term = "Prelim"
+    else:
+        return None
+    if not name or not subject:
+        return None
+
+    # registrar exports repeat the same few deadlines thousands of times
+    if deadline not in deadline_cache:
+        deadline_dt = db.parse_deadline(deadline)
+        deadline_cache[deadline] = (
+            (deadline_dt.strftime("%Y-%m-%d %I:%M %p"), int(deadline_dt.timestamp()))
+            if deadline_dt is not None else None
+        )
+    normalized = deadline_cache[deadline]
+    if normalized is None:
+        return None
+
+    status = "Completed" if status.lower() == "completed" else "Pending"
+    return (name, subject, section, course, year_level, instructor, term or "Prelim",
+            normalized[0], status, normalized[1])
+
+
+def import_tasks_csv(path, progress=None, batch_size=IMPORT_BATCH_SIZE):
+    # streams the file and commits every batch_size rows; returns (imported, skipped)
+    imported = skipped = 0
+    deadline_cache = {}
+    with open(path, newline="", encoding="utf-8-sig") as csv_file:
+        reader = csv.reader(csv_file)
+        # leading blank lines come through as [] and are skipped
+        first = next((row for row in reader if row), None)
+        if first is None:
+            return imported, skipped
+        if first[0].strip().lower() != "name":
+            reader = itertools.chain([first], reader)
+
+        batch = []
+        for row in reader:
+            record = normalize_import_row(row, deadline_cache)
+            if record is None:
+                skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                db.insert_tasks(batch)
+                imported += len(batch)
+                batch.clear()
+                if progress:
+                    progress(imported, skipped)
+        if batch:
+            db.insert_tasks(batch)
+            imported += len(batch)
+    if progress:
+        progress(imported, skipped)
+    return imported, skipped
+
+
+def export_tasks_csv(path, filters=None, compress=None, progress=None, batch_size=EXPORT_BATCH_SIZE):
+    # streams matching rows straight from a cursor; gzip when asked or when the
+    # file name ends in .gz. Returns the number of rows written.
+    filters = filters or {}
+    if compress is None:
+        compress = str(path).endswith(".gz")
+    total = db.count_matching_tasks(filters) if progress else None
+    exported = 0
+    opener = gzip.open if compress else open
+    with opener(path, "wt", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(EXPORT_HEADER)
+        for rows in db.iter_task_batches(filters, batch_size):
+            # TASK_COLUMNS minus id and deadline_ts is exactly the export layout
+            writer.writerows(row[1:10] for row in rows)
+            exported += len(rows)
+            if progress:
+                progress(exported, total)
+    return exported
@@ -0,0 +1,1840 @@
+# Student Schedule Reminder - database access
+import datetime
+import functools
+import hashlib
+import hmac
+import marshal
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import schedule_metrics as metrics
+
+DB_PATH = Path(__file__).with_name("schedule.db")
+BUSY_TIMEOUT_MS = 5000
+# after busy_timeout gives up, writes are retried this many more times with
+# jittered exponential backoff starting at LOCK_RETRY_DELAY seconds
+LOCK_RETRIES = 4
+LOCK_RETRY_DELAY = 0.05
+STATEMENT_CACHE_SIZE = 256
+# bump when the snapshot layout changes; old files are then ignored
+SNAPSHOT_FORMAT = 1
+
+# stored as pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>; raising the
+# iteration count upgrades each account the next time it logs in
+PASSWORD_HASH_ITERATIONS = 200000
+PASSWORD_SALT_BYTES = 16
+PASSWORD_SCHEME = "pbkdf2_sha256"
+# most recently used accounts kept in memory for role/name lookups
+USER_CACHE_SIZE = 256
+
+DEFAULT_USERS = {
+    "student": {"password": "1234", "fullname": "Student User", "role": "student"},
+    "admin": {"password": "admin123", "fullname": "Administrator", "role": "admin"},
+    "instructor": {"password": "teach123", "fullname": "Instructor", "role": "instructor"}
+}
+
+DEADLINE_FORMATS = ("%Y-%m-%d %I:%M %p", "%Y-%m-%d %H:%M")
+TASK_CHANGE_RETENTION = 100000
+SUMMARY_DIMENSIONS = ("subject", "section", "term")
+FILTER_COLUMNS = ("term", "section", "course", "year_level", "status")
+SEARCH_COLUMNS = ("name", "subject", "instructor")
+ENROLLMENT_COLUMNS = ("section", "course", "year_level")
+# bm25 weight per SEARCH_COLUMNS entry; a hit in the task name counts most
+SEARCH_WEIGHTS = (10.0, 4.0, 2.0)
+# scoring every hit of a broad prefix ("p", "pro") is what makes type-ahead
+# slow, so above this many hits results come back newest first instead
+SEARCH_RANK_LIMIT = 5000
+# (seconds before the deadline, title) in the order the reminders fire
+REMINDER_STAGES = (
+    (10800, "Almost Due"),
+    (60, "Due Now"),
+    (0, "Overdue"),
+)
+TASK_COLUMNS = (
+    "id", "name", "subject", "section", "course", "year_level",
+    "instructor", "term", "deadline", "status", "deadline_ts", "version",
+)
+# the same handful of values repeat across thousands of tasks
+INTERNED_COLUMNS = frozenset(("subject", "section", "course", "year_level", "instructor", "term", "status"))
+SERIES_COLUMNS = (
+    "id", "name", "subject", "section", "course", "year_level",
+    "instructor", "term", "starts_ts", "interval_days", "until_ts",
+)
+# occurrences of a recurring series are never stored until they are completed
+# or edited; until then they carry the id -(series_id * OCCURRENCE_ID_SPAN +
+# index), which cannot clash with a stored task and decodes back to its slot
+OCCURRENCE_ID_SPAN = 100000
+# change-feed entry meaning "a series changed": clients reload everything
+SERIES_CHANGE_ID = 0
+
+# a task belongs to a student when its section, course and year level match
+# one of their enrollments; a primary-key lookup per candidate task
+ENROLLED_CLAUSE = """EXISTS (
+    SELECT 1 FROM enrollments
+    WHERE enrollments.username = ? AND enrollments.section = tasks.section
+    AND enrollments.course = tasks.course AND enrollments.year_level = tasks.year_level
+)"""
+
+# the same test for a recurring series
+SERIES_ENROLLED_CLAUSE = """EXISTS (
+    SELECT 1 FROM enrollments
+    WHERE enrollments.username = ? AND enrollments.section = task_series.section
+    AND enrollments.course = task_series.course AND enrollments.year_level = task_series.year_level
+)"""
+
+_local = threading.local()
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+# ---------------------------------------------
+# CONNECTION
+# ---------------------------------------------
+class MeteredCursor(sqlite3.Cursor):
+    # counts rows as they are fetched and times statements run on the cursor
+    # itself; only handed out while metrics are on
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        metrics.observe("sqlite " + sys._getframe(1).f_code.co_name, (time.perf_counter() - started) * 1000)
+        return self
+
+    def executemany(self, sql, parameters):
+        started = time.perf_counter()
+        super().executemany(sql, parameters)
+        metrics.observe("sqlite " + sys._getframe(1).f_code.co_name, (time.perf_counter() - started) * 1000)
+        metrics.count("sqlite rows written", max(self.rowcount, 0))
+        return self
+
+    def __next__(self):
+        row = super().__next__()
+        metrics.count("sqlite rows fetched")
+        return row
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            metrics.count("sqlite rows fetched")
+        return row
+
+    def fetchmany(self, *args):
+        rows = super().fetchmany(*args)
+        metrics.count("sqlite rows fetched", len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        metrics.count("sqlite rows fetched", len(rows))
+        return rows
+
+
+class MeteredConnection(sqlite3.Connection):
+    # times each statement (prepare through its first row) under the name of
+    # the function that ran it; with metrics off the only cost is the flag check
+
+    def cursor(self, factory=sqlite3.Cursor):
+        if factory is sqlite3.Cursor and metrics.enabled:
+            factory = MeteredCursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if not metrics.enabled:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        cursor = self.cursor(MeteredCursor)
+        # timed here, under this caller's name, rather than by the cursor
+        sqlite3.Cursor.execute(cursor, sql, parameters)
+        metrics.observe("sqlite " + sys._getframe(1).f_code.co_name, (time.perf_counter() - started) * 1000)
+        return cursor
+
+    def executemany(self, sql, parameters):
+        if not metrics.enabled:
+            return super().executemany(sql, parameters)
+        started = time.perf_counter()
+        cursor = super().executemany(sql, parameters)
+        metrics.observe("sqlite " + sys._getframe(1).f_code.co_name, (time.perf_counter() - started) * 1000)
+        metrics.count("sqlite rows written", max(cursor.rowcount, 0))
+        return cursor
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_when_locked(func):
+    # for writers only: each attempt is a whole transaction, so a retry never
+    # repeats half of one
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(LOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as exc:
+                if attempt == LOCK_RETRIES or not is_lock_error(exc):
+                    raise
+                metrics.count("sqlite lock retries")
+                time.sleep(LOCK_RETRY_DELAY * (2 ** attempt) * (0.5 + random.random()))
+    return wrapper
+
+
+def get_connection():
+    # one long-lived connection per thread; sqlite3 connections must not be
+    # shared across threads and reopening them costs more than the queries
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=STATEMENT_CACHE_SIZE, factory=MeteredConnection)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        _local.conn = conn
+    return conn
+
+
+def set_db_path(path):
+    # point this process at another database file; drops this thread's
+    # connection so the next call reopens against the new path
+    global DB_PATH
+    close_connection()
+    DB_PATH = Path(path)
+
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    _local.archive_attached = False
+
+
+def data_version():
+    # changes whenever another connection commits to the database file
+    return get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+# ---------------------------------------------
+# SCHEMA
+# ---------------------------------------------
+def ensure_table_columns(cursor, table_name, columns):
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column_name, definition in columns.items():
+        if column_name not in existing:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {definition}")
+
+
+def summary_adjust(ref, sign):
+    # one upsert per dashboard group for the row referenced by NEW/OLD
+    groups = [("all", "''")] + [(dimension, f"{ref}.{dimension}") for dimension in SUMMARY_DIMENSIONS]
+    statements = []
+    for dimension, value in groups:
+        statements.append(
+            f"""
+            INSERT INTO task_summary (dimension, value, total, pending, completed)
+            VALUES ('{dimension}', {value}, {sign}, {sign} * ({ref}.status = 'Pending'),
+                    {sign} * ({ref}.status = 'Completed'))
+            ON CONFLICT (dimension, value) DO UPDATE SET
+                total = total + excluded.total,
+                pending = pending + excluded.pending,
+                completed = completed + excluded.completed;
+            """
+        )
+        if sign < 0:
+            statements.append(
+                f"DELETE FROM task_summary WHERE dimension = '{dimension}' AND value = {value} AND total = 0;"
+            )
+    return "\n".join(statements)
+
+
+def create_summary_triggers(cursor):
+    columns = ", ".join(SUMMARY_DIMENSIONS + ("status",))
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_summary_insert AFTER INSERT ON tasks
+        BEGIN
+            {summary_adjust("NEW", 1)}
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_summary_delete AFTER DELETE ON tasks
+        BEGIN
+            {summary_adjust("OLD", -1)}
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_summary_update AFTER UPDATE OF {columns} ON tasks
+        BEGIN
+            {summary_adjust("OLD", -1)}
+            {summary_adjust("NEW", 1)}
+        END
+        """
+    )
+
+
+def rebuild_task_summary(cursor):
+    cursor.execute("DELETE FROM task_summary")
+    groups = [("all", "''")] + [(dimension, dimension) for dimension in SUMMARY_DIMENSIONS]
+    for dimension, value in groups:
+        cursor.execute(
+            f"""
+            INSERT INTO task_summary (dimension, value, total, pending, completed)
+            SELECT '{dimension}', {value}, COUNT(*), SUM(status = 'Pending'), SUM(status = 'Completed')
+            FROM tasks
+            GROUP BY {value}
+            """
+        )
+
+
+def create_search_index(cursor):
+    # external-content FTS5 index over SEARCH_COLUMNS kept in step by triggers;
+    # returns False when this SQLite build has no FTS5 (search then uses LIKE)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")
+    if cursor.fetchone() is not None:
+        return True
+    columns = ", ".join(SEARCH_COLUMNS)
+    try:
+        cursor.execute(
+            f"""
+            CREATE VIRTUAL TABLE tasks_fts USING fts5(
+                {columns}, content = 'tasks', content_rowid = 'id', prefix = '1 2 3'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        return False
+
+    new_values = ", ".join(f"NEW.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"OLD.{column}" for column in SEARCH_COLUMNS)
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF {columns} ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO tasks_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+        END
+        """
+    )
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+    return True
+
+
+def migrate_base_tables(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL,
+            fullname TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'student'
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            section TEXT NOT NULL,
+            course TEXT NOT NULL,
+            year_level TEXT NOT NULL,
+            instructor TEXT NOT NULL,
+            term TEXT NOT NULL,
+            deadline TEXT NOT NULL,
+            status TEXT NOT NULL
+        )
+        """
+    )
+
+    ensure_table_columns(cursor, "users", {
+        "role": "role TEXT NOT NULL DEFAULT 'student'"
+    })
+
+    ensure_table_columns(cursor, "tasks", {
+        "section": "section TEXT NOT NULL DEFAULT ''",
+        "course": "course TEXT NOT NULL DEFAULT ''",
+        "year_level": "year_level TEXT NOT NULL DEFAULT ''",
+        "instructor": "instructor TEXT NOT NULL DEFAULT ''",
+        "term": "term TEXT NOT NULL DEFAULT 'Prelim'"
+    })
+
+    for username, info in DEFAULT_USERS.items():
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO users (username, password, fullname, role)
+            VALUES (?, ?, ?, ?)
+            """,
+            (username, hash_password(info["password"]), info["fullname"], info["role"])
+        )
+        cursor.execute(
+            "UPDATE users SET role = ? WHERE username = ?",
+            (info["role"], username)
+        )
+
+
+def migrate_deadline_index(cursor):
+    ensure_table_columns(cursor, "tasks", {"deadline_ts": "deadline_ts INTEGER"})
+    cursor.execute("SELECT id, deadline FROM tasks WHERE deadline_ts IS NULL")
+    backfill = []
+    for task_id, deadline in cursor.fetchall():
+        deadline_ts = deadline_timestamp(deadline)
+        if deadline_ts is not None:
+            backfill.append((deadline_ts, task_id))
+    cursor.executemany("UPDATE tasks SET deadline_ts = ? WHERE id = ?", backfill)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_deadline ON tasks (status, deadline_ts)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks (deadline_ts, id)")
+
+
+def migrate_change_feed(cursor):
+    # change feed: every write to tasks appends its id so clients can sync deltas
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL
+        )
+        """
+    )
+    for event, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS tasks_log_{event.lower()} AFTER {event} ON tasks
+            BEGIN
+                INSERT INTO task_changes (task_id) VALUES ({ref}.id);
+            END
+            """
+        )
+    # pruning used to run on every startup; now every 1000th entry trims the
+    # log, so opening an up-to-date database never needs a write
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS task_changes_prune AFTER INSERT ON task_changes
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM task_changes WHERE seq <= NEW.seq - {TASK_CHANGE_RETENTION};
+        END
+        """
+    )
+    cursor.execute(
+        "DELETE FROM task_changes WHERE seq <= (SELECT MAX(seq) FROM task_changes) - ?",
+        (TASK_CHANGE_RETENTION,)
+    )
+
+
+def migrate_task_summary(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_summary (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            pending INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+        """
+    )
+    create_summary_triggers(cursor)
+    rebuild_task_summary(cursor)
+
+
+def migrate_search(cursor):
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_filters ON tasks (term, section, course, year_level)"
+    )
+    create_search_index(cursor)
+
+
+def migrate_enrollments(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS enrollments (
+            username TEXT NOT NULL REFERENCES users (username) ON DELETE CASCADE,
+            section TEXT NOT NULL,
+            course TEXT NOT NULL,
+            year_level TEXT NOT NULL,
+            PRIMARY KEY (username, section, course, year_level)
+        ) WITHOUT ROWID
+        """
+    )
+    # walks one enrollment's tasks in deadline order without touching the rest
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_cohort ON tasks (section, course, year_level, deadline_ts)"
+    )
+
+
+def migrate_task_versions(cursor):
+    # bumped by every write to a task so edits can compare-and-swap
+    ensure_table_columns(cursor, "tasks", {
+        "version": "version INTEGER NOT NULL DEFAULT 1"
+    })
+
+
+def migrate_notifications(cursor):
+    # per-user reminder progress so a restart does not re-alert every task;
+    # stage is the last REMINDER_STAGES index shown and next_due_ts is when
+    # this user should hear about the task again (NULL: never)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_notifications (
+            username TEXT NOT NULL,
+            task_id INTEGER NOT NULL,
+            stage INTEGER NOT NULL,
+            notified_at INTEGER NOT NULL,
+            snoozed_until INTEGER,
+            acknowledged INTEGER NOT NULL DEFAULT 0,
+            next_due_ts INTEGER,
+            PRIMARY KEY (username, task_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_task_notifications_task ON task_notifications (task_id)"
+    )
+    # a new deadline or status starts the reminders over for everyone
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_notifications_reset AFTER UPDATE OF deadline_ts, status ON tasks
+        WHEN OLD.deadline_ts IS NOT NEW.deadline_ts OR OLD.status IS NOT NEW.status
+        BEGIN
+            DELETE FROM task_notifications WHERE task_id = NEW.id;
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_notifications_delete AFTER DELETE ON tasks
+        BEGIN
+            DELETE FROM task_notifications WHERE task_id = OLD.id;
+        END
+        """
+    )
+
+
+def migrate_task_series(cursor):
+    # a recurring task is one row here; its occurrences are generated on
+    # demand. Only occurrences that were completed or edited become rows in
+    # tasks (series_id, occurrence_ts); deleted ones go to task_series_skips.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            section TEXT NOT NULL,
+            course TEXT NOT NULL,
+            year_level TEXT NOT NULL,
+            instructor TEXT NOT NULL,
+            term TEXT NOT NULL,
+            starts_ts INTEGER NOT NULL,
+            interval_days INTEGER NOT NULL CHECK (interval_days > 0),
+            until_ts INTEGER NOT NULL CHECK (until_ts >= starts_ts)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_series_skips (
+            series_id INTEGER NOT NULL,
+            occurrence_ts INTEGER NOT NULL,
+            PRIMARY KEY (series_id, occurrence_ts)
+        ) WITHOUT ROWID
+        """
+    )
+    ensure_table_columns(cursor, "tasks", {
+        "series_id": "series_id INTEGER",
+        "occurrence_ts": "occurrence_ts INTEGER",
+    })
+    cursor.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_series
+        ON tasks (series_id, occurrence_ts) WHERE series_id IS NOT NULL
+        """
+    )
+    # occurrences are not in the change feed, so any series change tells
+    # clients to reload
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS task_series_log_{event.lower()} AFTER {event} ON task_series
+            BEGIN
+                INSERT INTO task_changes (task_id) VALUES ({SERIES_CHANGE_ID});
+            END
+            """
+        )
+    # a stored occurrence that is deleted must not come back as a virtual one
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_series_skip AFTER DELETE ON tasks
+        WHEN OLD.series_id IS NOT NULL
+        BEGIN
+            INSERT OR IGNORE INTO task_series_skips (series_id, occurrence_ts)
+            VALUES (OLD.series_id, OLD.occurrence_ts);
+        END
+        """
+    )
+
+
+# applied in order; PRAGMA user_version records how many have run. Steps must
+# stay idempotent because databases created before versioning start at 0
+# with some of the schema already in place. Only ever append to this list.
+MIGRATIONS = (
+    migrate_base_tables,
+    migrate_deadline_index,
+    migrate_change_feed,
+    migrate_task_summary,
+    migrate_search,
+    migrate_enrollments,
+    migrate_notifications,
+    migrate_task_versions,
+    migrate_task_series,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn=None):
+    conn = conn or get_connection()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_db():
+    conn = get_connection()
+    # an up-to-date database costs one read and never takes the write lock
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    with conn:
+        # re-read under the write lock in case another process just migrated
+        cursor = conn.cursor()
+        for version in range(schema_version(conn), SCHEMA_VERSION):
+            MIGRATIONS[version](cursor)
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+
+
+# ---------------------------------------------
+# USERS
+# ---------------------------------------------
+def hash_password(password, iterations=None):
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = os.urandom(PASSWORD_SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{PASSWORD_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(stored, password):
+    # (matches, needs_rehash); rows from before hashing hold the plain password
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != PASSWORD_SCHEME:
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8")), True
+    try:
+        iterations = int(parts[1])
+        salt = bytes.fromhex(parts[2])
+        expected = bytes.fromhex(parts[3])
+    except ValueError:
+        return False, False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return hmac.compare_digest(digest, expected), iterations != PASSWORD_HASH_ITERATIONS
+
+
+# checked against for unknown usernames: one PBKDF2 run at the current cost,
+# like a real account, and nothing to compute at import time
+_DUMMY_HASH = f"{PASSWORD_SCHEME}${PASSWORD_HASH_ITERATIONS}${'00' * PASSWORD_SALT_BYTES}${'00' * 32}"
+
+
+def user_from_row(row):
+    return {"username": row[0], "fullname": row[2], "role": row[3] or "student"}
+
+
+def cache_user(username, user):
+    with _user_cache_lock:
+        if user is None:
+            _user_cache.pop(username, None)
+            return
+        _user_cache[username] = user
+        _user_cache.move_to_end(username)
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+
+
+def fetch_user(username):
+    # {"username", "fullname", "role"} or None; a primary-key read, cached
+    with _user_cache_lock:
+        user = _user_cache.get(username)
+        if user is not None:
+            _user_cache.move_to_end(username)
+            return user
+    row = get_connection().execute(
+        "SELECT username, password, fullname, role FROM users WHERE username = ?", (username,)
+    ).fetchone()
+    user = user_from_row(row) if row else None
+    if user is not None:
+        cache_user(username, user)
+    return user
+
+
+def authenticate(username, password):
+    # always reads the row (never the cache) so removed accounts and changed
+    # passwords take effect at once; upgrades plain or outdated hashes in place
+    row = get_connection().execute(
+        "SELECT username, password, fullname, role FROM users WHERE username = ?", (username,)
+    ).fetchone()
+    if row is None:
+        # same hashing cost as a real account so timing does not reveal names
+        verify_password(_DUMMY_HASH, password)
+        return None
+    matches, needs_rehash = verify_password(row[1], password)
+    if not matches:
+        return None
+    if needs_rehash:
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+                (hash_password(password), username, row[1])
+            )
+    user = user_from_row(row)
+    cache_user(username, user)
+    return user
+
+
+def fetch_users():
+    # every account; for admin listings only, logins use fetch_user
+    rows = get_connection().execute(
+        "SELECT username, password, fullname, role FROM users ORDER BY username"
+    ).fetchall()
+    return {row[0]: user_from_row(row) for row in rows}
+
+
+def fetch_usernames(prefix="", role=None, limit=50):
+    # a primary-key range scan, so type-ahead stays cheap with many accounts
+    query = "SELECT username FROM users WHERE username >= ? AND username < ?"
+    params = [prefix, prefix + "\U0010ffff"]
+    if role is not None:
+        query += " AND role = ?"
+        params.append(role)
+    query += " ORDER BY username LIMIT ?"
+    params.append(limit)
+    return [row[0] for row in get_connection().execute(query, params)]
+
+
+def add_user(username, password, fullname, role="student"):
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (username, password, fullname, role) VALUES (?, ?, ?, ?)",
+            (username, hash_password(password), fullname, role)
+        )
+    cache_user(username, None)
+
+
+def delete_user(username):
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM enrollments WHERE username = ?", (username,))
+        cursor = conn.execute("DELETE FROM users WHERE username = ?", (username,))
+    cache_user(username, None)
+    return cursor.rowcount > 0
+
+
+def fetch_enrollments(username):
+    return get_connection().execute(
+        "SELECT section, course, year_level FROM enrollments WHERE username = ? ORDER BY section, course, year_level",
+        (username,)
+    ).fetchall()
+
+
+@retry_when_locked
+def enroll_user(username, section, course, year_level):
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO enrollments (username, section, course, year_level) VALUES (?, ?, ?, ?)",
+            (username, section, course, year_level)
+        )
+
+
+@retry_when_locked
+def unenroll_user(username, section, course, year_level):
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            "DELETE FROM enrollments WHERE username = ? AND section = ? AND course = ? AND year_level = ?",
+            (username, section, course, year_level)
+        )
+
+# ---------------------------------------------
+# TASKS
+# ---------------------------------------------
+def scoped_tasks(username):
+    # FROM clause, WHERE clause and params limiting tasks to `username`'s
+    # enrollments; username None means every task. The join starts from the
+    # enrollments, so the work grows with the student's tasks, not the table.
+    if username is None:
+        return "tasks", "1", []
+    join = " AND ".join(f"tasks.{column} = enrollments.{column}" for column in ENROLLMENT_COLUMNS)
+    return f"enrollments CROSS JOIN tasks ON {join}", "enrollments.username = ?", [username]
+
+
+def intern_text(value):
+    return sys.intern(value) if value.__class__ is str else value
+
+
+class TaskRecord:
+    # One task as loaded by the app. Slots instead of a dict per task, and
+    # INTERNED_COLUMNS share one string object per distinct value, so a large
+    # table costs a fraction of the memory. task["name"] style access, get(),
+    # items() and update() keep it interchangeable with the old dicts.
+    __slots__ = TASK_COLUMNS
+
+    def __init__(self, id=None, name=None, subject=None, section=None, course=None, year_level=None,
+                 instructor=None, term=None, deadline=None, status=None, deadline_ts=None, version=1):
+        self.id = id
+        self.name = name
+        self.subject = intern_text(subject)
+        self.section = intern_text(section)
+        self.course = intern_text(course)
+        self.year_level = intern_text(year_level)
+        self.instructor = intern_text(instructor)
+        self.term = intern_text(term)
+        self.deadline = deadline
+        self.status = intern_text(status)
+        self.deadline_ts = deadline_ts
+        self.version = version
+
+    def __getitem__(self, column):
+        try:
+            return getattr(self, column)
+        except (AttributeError, TypeError):
+            raise KeyError(column) from None
+
+    def __setitem__(self, column, value):
+        if column not in TASK_COLUMNS:
+            raise KeyError(column)
+        setattr(self, column, intern_text(value) if column in INTERNED_COLUMNS else value)
+
+    def __contains__(self, column):
+        return column in TASK_COLUMNS
+
+    def __repr__(self):
+        return f"TaskRecord({', '.join(f'{column}={getattr(self, column)!r}' for column in TASK_COLUMNS)})"
+
+    def get(self, column, default=None):
+        return getattr(self, column, default) if column in TASK_COLUMNS else default
+
+    def items(self):
+        return [(column, getattr(self, column)) for column in TASK_COLUMNS]
+
+    def update(self, changes):
+        for column, value in changes.items():
+            self[column] = value
+
+    def copy(self):
+        return TaskRecord(*[getattr(self, column) for column in TASK_COLUMNS])
+
+
+def task_from_row(row):
+    # row holds TASK_COLUMNS in order
+    return TaskRecord(*row)
+
+
+def fetch_task(task_id):
+    if is_occurrence_id(task_id):
+        return fetch_occurrence(task_id)
+    row = get_connection().execute(
+        f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE id = ?", (task_id,)
+    ).fetchone()
+    return task_from_row(row) if row else None
+
+
+def fetch_all_tasks(username=None, window=None):
+    # with a (start_ts, end_ts) window, recurring occurrences due in it follow
+    # the stored tasks, series by series
+    source, where, params = scoped_tasks(username)
+    columns = ", ".join(f"tasks.{column}" for column in TASK_COLUMNS)
+    cursor = get_connection().execute(
+        f"SELECT {columns} FROM {source} WHERE {where} ORDER BY tasks.id", params
+    )
+    tasks = [task_from_row(row) for row in cursor]
+    if window is not None:
+        tasks.extend(sorted(iter_window_occurrences(window, username), key=lambda task: -task.id))
+    return tasks
+
+
+@retry_when_locked
+def insert_task(task):
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO tasks (name, subject, section, course, year_level, instructor, term, deadline, status,
+                               deadline_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (task["name"], task["subject"], task["section"], task["course"], task["year_level"],
+             task["instructor"], task["term"], task["deadline"], task["status"], task["deadline_ts"])
+        )
+    return cursor.lastrowid
+
+
+@retry_when_locked
+def insert_tasks(rows):
+    # rows are tuples in the INSERT column order below, written in one transaction
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO tasks (name, subject, section, course, year_level, instructor, term, deadline, status,
+                               deadline_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+
+
+@retry_when_locked
+def update_task(task_id, fields, expected_version=None):
+    # returns the task's new version, or None when the task is gone or, with
+    # expected_version, someone else wrote it first (nothing is changed then)
+    columns = [column for column in fields if column in TASK_COLUMNS and column not in ("id", "version")]
+    assignments = [f"{column} = ?" for column in columns] + ["version = version + 1"]
+    query = f"UPDATE tasks SET {', '.join(assignments)} WHERE id = ?"
+    params = [fields[column] for column in columns] + [task_id]
+    if expected_version is not None:
+        query += " AND version = ?"
+        params.append(expected_version)
+    conn = get_connection()
+    with conn:
+        if conn.execute(query, params).rowcount == 0:
+            return None
+        return conn.execute("SELECT version FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+
+
+@retry_when_locked
+def set_task_status(task_id, status):
+    conn = get_connection()
+    with conn:
+        conn.execute("UPDATE tasks SET status = ?, version = version + 1 WHERE id = ?", (status, task_id))
+
+
+@retry_when_locked
+def delete_task(task_id):
+    if is_occurrence_id(task_id):
+        skip_occurrence(task_id)
+        return
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+
+def count_tasks(username=None, window=None):
+    # maintained by the tasks_summary_* triggers, so this is a single key lookup;
+    # a student's counts are aggregated over their own tasks only. Occurrences
+    # due in `window` are added on top; they are always pending.
+    if username is not None:
+        source, where, params = scoped_tasks(username)
+        row = get_connection().execute(
+            f"""
+            SELECT COUNT(*), IFNULL(SUM(tasks.status = 'Pending'), 0), IFNULL(SUM(tasks.status = 'Completed'), 0)
+            FROM {source} WHERE {where}
+            """,
+            params
+        ).fetchone()
+    else:
+        row = get_connection().execute(
+            "SELECT total, pending, completed FROM task_summary WHERE dimension = 'all' AND value = ''"
+        ).fetchone() or (0, 0, 0)
+    if window is not None:
+        occurrences = sum(1 for _ in iter_window_occurrences(window, username))
+        row = (row[0] + occurrences, row[1] + occurrences, row[2])
+    return row
+
+
+def fetch_task_summary(dimension, username=None, window=None):
+    if dimension not in SUMMARY_DIMENSIONS:
+        raise ValueError("Unsupported summary requested.")
+    rows = stored_task_summary(dimension, username)
+    if window is None:
+        return rows
+    totals = {row[0]: list(row[1:]) for row in rows}
+    for task in iter_window_occurrences(window, username):
+        counts = totals.setdefault(task[dimension], [0, 0, 0])
+        counts[0] += 1
+        counts[1] += 1
+    return [(value,) + tuple(counts) for value, counts in sorted(totals.items())]
+
+
+def stored_task_summary(dimension, username=None):
+    if username is not None:
+        source, where, params = scoped_tasks(username)
+        return get_connection().execute(
+            f"""
+            SELECT tasks.{dimension}, COUNT(*), SUM(tasks.status = 'Pending'), SUM(tasks.status = 'Completed')
+            FROM {source} WHERE {where}
+            GROUP BY tasks.{dimension} ORDER BY tasks.{dimension}
+            """,
+            params
+        ).fetchall()
+    return get_connection().execute(
+        "SELECT value, total, pending, completed FROM task_summary WHERE dimension = ? ORDER BY value",
+        (dimension,)
+    ).fetchall()
+
+
+def fetch_task_page(after=None, before=None, limit=100, username=None, window=None):
+    # keyset pagination over (deadline_ts, id); like SQLite's own ordering,
+    # tasks without a deadline_ts sort before every dated task. Each segment
+    # is queried separately so both walk idx_tasks_deadline without a sort.
+    # With a window, recurring occurrences between the page's first and last
+    # keys are merged in, so paging walks stored and virtual rows alike.
+    columns = ", ".join(TASK_COLUMNS)
+    scope, scope_params = ("1", []) if username is None else (ENROLLED_CLAUSE, [username])
+    if before is not None:
+        deadline_ts, task_id = before
+        segments = []
+        if deadline_ts is not None:
+            segments.append(("(deadline_ts, id) < (?, ?)", [deadline_ts, task_id]))
+            segments.append(("deadline_ts IS NULL", []))
+        else:
+            segments.append(("deadline_ts IS NULL AND id < ?", [task_id]))
+        order = "deadline_ts DESC, id DESC"
+    else:
+        if after is None:
+            segments = [("deadline_ts IS NULL", []), ("deadline_ts IS NOT NULL", [])]
+        elif after[0] is None:
+            segments = [("deadline_ts IS NULL AND id > ?", [after[1]]), ("deadline_ts IS NOT NULL", [])]
+        else:
+            segments = [("(deadline_ts, id) > (?, ?)", list(after))]
+        order = "deadline_ts, id"
+
+    conn = get_connection()
+    rows = []
+    for where, params in segments:
+        if len(rows) >= limit:
+            break
+        rows.extend(conn.execute(
+            f"SELECT {columns} FROM tasks WHERE {where} AND {scope} ORDER BY {order} LIMIT ?",
+            params + scope_params + [limit - len(rows)]
+        ).fetchall())
+    if before is not None:
+        rows.reverse()
+    page = [task_from_row(row) for row in rows]
+    if window is None:
+        return page
+
+    full = len(page) >= limit
+    if before is None:
+        low = page_order_key(after) if after is not None else None
+        high = task_order_key(page[-1]) if full else None
+    else:
+        low = task_order_key(page[0]) if full else None
+        high = page_order_key(before)
+    for task in iter_window_occurrences(window, username):
+        key = task_order_key(task)
+        if before is None and (low is None or key > low) and (high is None or key <= high):
+            page.append(task)
+        elif before is not None and (low is None or key >= low) and key < high:
+            page.append(task)
+    page.sort(key=task_order_key)
+    if before is None:
+        return page[:limit]
+    return page[-limit:] if limit else []
+
+
+def task_order_key(task):
+    # (deadline_ts, id) ordering with missing deadlines first, as SQLite sorts them
+    return task.deadline_ts is not None, task.deadline_ts or 0, task.id
+
+
+def page_order_key(key):
+    deadline_ts, task_id = key
+    return deadline_ts is not None, deadline_ts or 0, task_id
+
+
+def latest_task_change():
+    return get_connection().execute("SELECT IFNULL(MAX(seq), 0) FROM task_changes").fetchone()[0]
+
+
+def fetch_task_changes(since_seq, username=None):
+    # returns (latest_seq, changed_tasks, deleted_ids), or None when the log was
+    # pruned past since_seq or a recurring series changed, and the caller has to
+    # reload everything. With a username, tasks outside their enrollments are
+    # reported as deleted.
+    scope, scope_params = ("1", []) if username is None else (ENROLLED_CLAUSE, [username])
+    cursor = get_connection().cursor()
+    latest_seq = cursor.execute("SELECT IFNULL(MAX(seq), 0) FROM task_changes").fetchone()[0]
+    if latest_seq == since_seq:
+        return latest_seq, [], set()
+    first_seq = cursor.execute("SELECT MIN(seq) FROM task_changes").fetchone()[0]
+    if latest_seq < since_seq or first_seq is None or first_seq > since_seq + 1:
+        return None
+
+    cursor.execute(
+        "SELECT DISTINCT task_id FROM task_changes WHERE seq > ? AND seq <= ?",
+        (since_seq, latest_seq)
+    )
+    changed_ids = [row[0] for row in cursor.fetchall()]
+    if SERIES_CHANGE_ID in changed_ids:
+        # occurrences are not logged one by one, so a series change means reload
+        return None
+    changed = []
+    for start in range(0, len(changed_ids), 500):
+        chunk = changed_ids[start:start + 500]
+        cursor.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))}) AND {scope}",
+            chunk + scope_params
+        )
+        changed.extend(task_from_row(row) for row in cursor.fetchall())
+    deleted = set(changed_ids) - {task["id"] for task in changed}
+    return latest_seq, changed, deleted
+
+
+def fetch_pending_deadlines(start_ts=None, end_ts=None, username=None, window=None):
+    # served by idx_tasks_status_deadline (idx_tasks_cohort for one student);
+    # both bounds are inclusive. Occurrences are only generated inside window.
+    source, where, params = scoped_tasks(username)
+    query = f"""
+        SELECT tasks.id, tasks.deadline_ts FROM {source}
+        WHERE {where} AND tasks.status = 'Pending' AND tasks.deadline_ts IS NOT NULL
+    """
+    if start_ts is not None:
+        query += " AND tasks.deadline_ts >= ?"
+        params.append(start_ts)
+    if end_ts is not None:
+        query += " AND tasks.deadline_ts <= ?"
+        params.append(end_ts)
+    query += " ORDER BY tasks.deadline_ts"
+    rows = get_connection().execute(query, params).fetchall()
+    if window is None:
+        return rows
+    low = window[0] if start_ts is None else max(window[0], start_ts)
+    high = window[1] if end_ts is None else min(window[1], end_ts)
+    rows.extend((task.id, task.deadline_ts) for task in iter_window_occurrences((low, high), username))
+    rows.sort(key=lambda row: row[1])
+    return rows
+
+def fetch_due_tasks(start_ts=None, end_ts=None, username=None, window=None):
+    # pending tasks with a deadline in [start_ts, end_ts], soonest first;
+    # recurring occurrences are only generated inside window
+    source, where, params = scoped_tasks(username)
+    columns = ", ".join(f"tasks.{column}" for column in TASK_COLUMNS)
+    query = f"""
+        SELECT {columns} FROM {source}
+        WHERE {where} AND tasks.status = 'Pending' AND tasks.deadline_ts IS NOT NULL
+    """
+    if start_ts is not None:
+        query += " AND tasks.deadline_ts >= ?"
+        params.append(start_ts)
+    if end_ts is not None:
+        query += " AND tasks.deadline_ts <= ?"
+        params.append(end_ts)
+    query += " ORDER BY tasks.deadline_ts, tasks.id"
+    tasks = [task_from_row(row) for row in get_connection().execute(query, params)]
+    if window is None:
+        return tasks
+    low = window[0] if start_ts is None else max(window[0], start_ts)
+    high = window[1] if end_ts is None else min(window[1], end_ts)
+    tasks.extend(iter_window_occurrences((low, high), username))
+    tasks.sort(key=lambda task: (task["deadline_ts"], task["id"]))
+    return tasks
+
+
+def task_visible_to(task_id, username):
+    # whether username's enrollments cover the task; None means every task
+    if username is None:
+        return fetch_task(task_id) is not None
+    if is_occurrence_id(task_id):
+        return get_connection().execute(
+            f"SELECT 1 FROM task_series WHERE id = ? AND {SERIES_ENROLLED_CLAUSE}",
+            (split_occurrence_id(task_id)[0], username)
+        ).fetchone() is not None and fetch_occurrence(task_id) is not None
+    return get_connection().execute(
+        f"SELECT 1 FROM tasks WHERE id = ? AND {ENROLLED_CLAUSE}", (task_id, username)
+    ).fetchone() is not None
+
+
+def fetch_tasks(task_ids):
+    task_ids = list(task_ids)
+    conn = get_connection()
+    tasks = [task for task in map(fetch_occurrence, filter(is_occurrence_id, task_ids)) if task is not None]
+    task_ids = [task_id for task_id in task_ids if not is_occurrence_id(task_id)]
+    for start in range(0, len(task_ids), 500):
+        chunk = task_ids[start:start + 500]
+        cursor = conn.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+        tasks.extend(task_from_row(row) for row in cursor)
+    return tasks
+
+
+def task_filter_clause(filters):
+    # filters: FILTER_COLUMNS (exact match), deadline_from / deadline_to
+    # (inclusive epoch seconds) and enrolled_user; empty values are ignored
+    clauses = []
+    params = []
+    if filters.get("enrolled_user"):
+        clauses.append(ENROLLED_CLAUSE)
+        params.append(filters["enrolled_user"])
+    for column in FILTER_COLUMNS:
+        if filters.get(column):
+            clauses.append(f"tasks.{column} = ?")
+            params.append(filters[column])
+    if filters.get("deadline_from") is not None:
+        clauses.append("tasks.deadline_ts >= ?")
+        params.append(filters["deadline_from"])
+    if filters.get("deadline_to") is not None:
+        clauses.append("tasks.deadline_ts <= ?")
+        params.append(filters["deadline_to"])
+    return (" AND ".join(clauses) or "1"), params
+
+
+def task_source(filters):
+    # the live table, or live and archived tasks when filters["include_archive"]
+    # is set; aliased so task_filter_clause works on either
+    if filters.get("include_archive"):
+        attach_archive()
+        return "tasks_with_archive AS tasks"
+    return "tasks"
+
+
+def count_matching_tasks(filters):
+    where, params = task_filter_clause(filters)
+    return get_connection().execute(
+        f"SELECT COUNT(*) FROM {task_source(filters)} WHERE {where}", params
+    ).fetchone()[0]
+
+
+def iter_task_batches(filters, batch_size=5000):
+    # yields lists of row tuples in TASK_COLUMNS order without loading the whole table
+    where, params = task_filter_clause(filters)
+    cursor = get_connection().execute(
+        f"SELECT {', '.join(TASK_COLUMNS)} FROM {task_source(filters)} WHERE {where} ORDER BY id", params
+    )
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def fetch_task_batch(filters, after_id=0, limit=5000):
+    # one keyset page of iter_task_batches, for callers that cannot hold a cursor open
+    where, params = task_filter_clause(filters)
+    return get_connection().execute(
+        f"SELECT {', '.join(TASK_COLUMNS)} FROM {task_source(filters)} WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+        params + [after_id, limit]
+    ).fetchall()
+
+# ---------------------------------------------
+# RECURRING TASKS
+# ---------------------------------------------
+def is_occurrence_id(task_id):
+    return task_id < 0
+
+
+def occurrence_id(series_id, index):
+    return -(series_id * OCCURRENCE_ID_SPAN + index)
+
+
+def split_occurrence_id(task_id):
+    # (series_id, index)
+    return divmod(-task_id, OCCURRENCE_ID_SPAN)
+
+
+def occurrence_deadline_ts(starts_ts, interval_days, index):
+    # calendar days rather than 86400-second steps, so the wall-clock time
+    # stays put across daylight saving changes
+    start = datetime.datetime.fromtimestamp(starts_ts)
+    return int((start + datetime.timedelta(days=interval_days * index)).timestamp())
+
+
+def iter_occurrences(series, start_ts, end_ts, exceptions=()):
+    # lazily yields the series' pending occurrences due in [start_ts, end_ts]
+    # as TaskRecords, leaving out the deadlines in `exceptions`
+    series_id, name, subject, section, course, year_level, instructor, term, starts_ts, interval_days, until_ts = series
+    end_ts = min(end_ts, until_ts)
+    # jump to just before the window instead of walking from the first slot
+    index = max((start_ts - starts_ts) // (interval_days * 86400) - 1, 0)
+    while index < OCCURRENCE_ID_SPAN:
+        deadline_ts = occurrence_deadline_ts(starts_ts, interval_days, index)
+        if deadline_ts > end_ts:
+            break
+        if deadline_ts >= start_ts and deadline_ts not in exceptions:
+            yield TaskRecord(occurrence_id(series_id, index), name, subject, section, course, year_level,
+                             instructor, term, format_deadline(deadline_ts), "Pending", deadline_ts)
+        index += 1
+
+
+def fetch_series(username=None, start_ts=None, end_ts=None):
+    # SERIES_COLUMNS tuples of the series with a slot in [start_ts, end_ts]
+    scope, params = ("1", []) if username is None else (SERIES_ENROLLED_CLAUSE, [username])
+    query = f"SELECT {', '.join(SERIES_COLUMNS)} FROM task_series WHERE {scope}"
+    if start_ts is not None:
+        query += " AND until_ts >= ?"
+        params.append(start_ts)
+    if end_ts is not None:
+        query += " AND starts_ts <= ?"
+        params.append(end_ts)
+    return get_connection().execute(query + " ORDER BY id", params).fetchall()
+
+
+def fetch_series_exceptions(series_ids, start_ts, end_ts):
+    # {series_id: {occurrence_ts}} of the occurrences stored in tasks or
+    # skipped, with deadlines in [start_ts, end_ts]
+    conn = get_connection()
+    exceptions = {}
+    for start in range(0, len(series_ids), 400):
+        chunk = list(series_ids[start:start + 400])
+        marks = ", ".join("?" * len(chunk))
+        cursor = conn.execute(
+            f"""
+            SELECT series_id, occurrence_ts FROM tasks
+            WHERE series_id IN ({marks}) AND occurrence_ts BETWEEN ? AND ?
+            UNION ALL
+            SELECT series_id, occurrence_ts FROM task_series_skips
+            WHERE series_id IN ({marks}) AND occurrence_ts BETWEEN ? AND ?
+            """,
+            chunk + [start_ts, end_ts] + chunk + [start_ts, end_ts]
+        )
+        for series_id, occurrence_ts in cursor:
+            exceptions.setdefault(series_id, set()).add(occurrence_ts)
+    return exceptions
+
+
+def iter_window_occurrences(window, username=None):
+    # every series' pending occurrences due in window = (start_ts, end_ts),
+    # generated as they are consumed; nothing outside the window is built
+    start_ts, end_ts = window
+    series = fetch_series(username, start_ts, end_ts)
+    exceptions = fetch_series_exceptions([row[0] for row in series], start_ts, end_ts)
+    for row in series:
+        yield from iter_occurrences(row, start_ts, end_ts, exceptions.get(row[0], ()))
+
+
+def fetch_occurrence(task_id):
+    # the virtual task behind an occurrence id, or None once it was stored,
+    # skipped, or its series removed
+    series_id, index = split_occurrence_id(task_id)
+    row = get_connection().execute(
+        f"SELECT {', '.join(SERIES_COLUMNS)} FROM task_series WHERE id = ?", (series_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    deadline_ts = occurrence_deadline_ts(row[8], row[9], index)
+    exceptions = fetch_series_exceptions([series_id], deadline_ts, deadline_ts).get(series_id, ())
+    return next(iter_occurrences(row, deadline_ts, deadline_ts, exceptions), None)
+
+
+@retry_when_locked
+def insert_series(series):
+    # series: the task fields except deadline/status, plus starts_ts (the first
+    # deadline), interval_days and until_ts (the last possible deadline)
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            f"INSERT INTO task_series ({', '.join(SERIES_COLUMNS[1:])}) VALUES ({', '.join('?' * 10)})",
+            [series[column] for column in SERIES_COLUMNS[1:]]
+        )
+    return cursor.lastrowid
+
+
+@retry_when_locked
+def materialize_occurrence(task_id, fields):
+    # stores one occurrence as a task row with `fields` applied, so it can be
+    # completed or edited on its own; returns the stored TaskRecord, or None
+    # when someone else stored or removed it first
+    occurrence = fetch_occurrence(task_id)
+    if occurrence is None:
+        return None
+    series_id, _index = split_occurrence_id(task_id)
+    occurrence_ts = occurrence.deadline_ts
+    occurrence.update({column: value for column, value in fields.items()
+                       if column in TASK_COLUMNS and column not in ("id", "version")})
+    conn = get_connection()
+    with conn:
+        try:
+            cursor = conn.execute(
+                """
+                INSERT INTO tasks (name, subject, section, course, year_level, instructor, term, deadline, status,
+                                   deadline_ts, series_id, occurrence_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (occurrence.name, occurrence.subject, occurrence.section, occurrence.course, occurrence.year_level,
+                 occurrence.instructor, occurrence.term, occurrence.deadline, occurrence.status,
+                 occurrence.deadline_ts, series_id, occurrence_ts)
+            )
+        except sqlite3.IntegrityError:
+            return None
+        task_id_stored = cursor.lastrowid
+        # reminder progress follows the occurrence to its new id
+        conn.execute("UPDATE task_notifications SET task_id = ? WHERE task_id = ?", (task_id_stored, task_id))
+        conn.execute("INSERT INTO task_changes (task_id) VALUES (?)", (task_id,))
+    return fetch_task(task_id_stored)
+
+
+def skip_occurrence(task_id):
+    series_id, index = split_occurrence_id(task_id)
+    row = get_connection().execute(
+        "SELECT starts_ts, interval_days FROM task_series WHERE id = ?", (series_id,)
+    ).fetchone()
+    if row is None:
+        return
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO task_series_skips (series_id, occurrence_ts) VALUES (?, ?)",
+            (series_id, occurrence_deadline_ts(row[0], row[1], index))
+        )
+        conn.execute("DELETE FROM task_notifications WHERE task_id = ?", (task_id,))
+        conn.execute("INSERT INTO task_changes (task_id) VALUES (?)", (task_id,))
+
+
+@retry_when_locked
+def delete_series(series_id):
+    # occurrences that were already completed or edited stay as plain tasks
+    conn = get_connection()
+    with conn:
+        conn.execute("UPDATE tasks SET series_id = NULL, occurrence_ts = NULL WHERE series_id = ?", (series_id,))
+        conn.execute("DELETE FROM task_series_skips WHERE series_id = ?", (series_id,))
+        conn.execute(
+            "DELETE FROM task_notifications WHERE task_id BETWEEN ? AND ?",
+            (occurrence_id(series_id, OCCURRENCE_ID_SPAN - 1), occurrence_id(series_id, 0))
+        )
+        conn.execute("DELETE FROM task_series WHERE id = ?", (series_id,))
+
+# ---------------------------------------------
+# ARCHIVE
+# ---------------------------------------------
+# finished work moves out of the live tasks table into a second file,
+# schedule_archive.db, attached on demand as "archive". The TEMP view
+# tasks_with_archive reads both, for exports and searches that ask for it.
+def archive_path():
+    return DB_PATH.with_name(f"{DB_PATH.stem}_archive{DB_PATH.suffix}")
+
+
+def attach_archive():
+    # this thread's connection with the archive attached (and created on first use)
+    conn = get_connection()
+    if getattr(_local, "archive_attached", False):
+        return conn
+    conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path()),))
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archive.tasks (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            section TEXT NOT NULL,
+            course TEXT NOT NULL,
+            year_level TEXT NOT NULL,
+            instructor TEXT NOT NULL,
+            term TEXT NOT NULL,
+            deadline TEXT NOT NULL,
+            status TEXT NOT NULL,
+            deadline_ts INTEGER,
+            version INTEGER NOT NULL,
+            archived_at INTEGER NOT NULL,
+            series_id INTEGER,
+            occurrence_ts INTEGER
+        )
+        """
+    )
+    # archives created before stored occurrences kept their series link
+    existing = {row[1] for row in conn.execute("PRAGMA archive.table_info(tasks)")}
+    for column in ("series_id", "occurrence_ts"):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE archive.tasks ADD COLUMN {column} INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_term ON tasks (term, deadline_ts)")
+    # a task in both files (a move cut short) is shown once, from the live table
+    columns = ", ".join(TASK_COLUMNS)
+    conn.execute(
+        f"""
+        CREATE TEMP VIEW IF NOT EXISTS tasks_with_archive AS
+        SELECT {columns} FROM main.tasks
+        UNION ALL
+        SELECT {columns} FROM archive.tasks WHERE id NOT IN (SELECT id FROM main.tasks)
+        """
+    )
+    _local.archive_attached = True
+    return conn
+
+
+def archive_clause(terms, completed_before):
+    clauses = []
+    params = list(terms)
+    if terms:
+        clauses.append(f"term IN ({', '.join('?' * len(terms))})")
+    if completed_before is not None:
+        clauses.append("(status = 'Completed' AND deadline_ts < ?)")
+        params.append(completed_before)
+    return " OR ".join(clauses), params
+
+
+def count_archivable_tasks(terms=(), completed_before=None):
+    where, params = archive_clause(list(terms), completed_before)
+    if not where:
+        return 0
+    return get_connection().execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+
+
+@retry_when_locked
+def archive_tasks(terms=(), completed_before=None):
+    # moves every task of the given (finished) terms, and completed tasks due
+    # before completed_before, into the archive; returns how many moved.
+    # Copy and delete are separate transactions: the live file is in WAL
+    # mode, so one spanning both files would not be atomic anyway. A task
+    # only leaves the live table if its archived copy has the same version,
+    # so an edit made in between keeps it live; archived copies of tasks that
+    # stayed live are dropped afterwards. A crash in between leaves a
+    # duplicate the view hides and the next run clears; never a lost task.
+    where, params = archive_clause(list(terms), completed_before)
+    if not where:
+        return 0
+    # stored occurrences keep their series link through the round trip
+    columns = ", ".join(TASK_COLUMNS + ("series_id", "occurrence_ts"))
+    conn = attach_archive()
+    with conn:
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO archive.tasks ({columns}, archived_at)
+            SELECT {columns}, ? FROM main.tasks WHERE {where}
+            """,
+            [int(time.time())] + params
+        )
+    # the delete triggers log the change feed and update task_summary, so
+    # clients drop the rows and the counters stay right
+    with conn:
+        cursor = conn.execute(
+            f"""
+            DELETE FROM main.tasks WHERE ({where}) AND EXISTS (
+                SELECT 1 FROM archive.tasks AS archived
+                WHERE archived.id = tasks.id AND archived.version = tasks.version
+            )
+            """,
+            params
+        )
+    moved = cursor.rowcount
+    # the live row wins, so a stale copy never resurfaces once it is deleted
+    with conn:
+        conn.execute("DELETE FROM archive.tasks WHERE id IN (SELECT id FROM main.tasks)")
+    return moved
+
+
+@retry_when_locked
+def restore_archived_tasks(terms):
+    # moves archived tasks of the given terms back into the live table, keeping
+    # their ids; copies first like archive_tasks
+    terms = list(terms)
+    if not terms:
+        return 0
+    marks = ", ".join("?" * len(terms))
+    columns = ", ".join(TASK_COLUMNS)
+    archived_columns = ", ".join(f"archived.{column}" for column in TASK_COLUMNS)
+    conn = attach_archive()
+    # the series link only comes back if the series still exists; delete_series
+    # turns its stored occurrences into plain tasks
+    with conn:
+        cursor = conn.execute(
+            f"""
+            INSERT OR IGNORE INTO main.tasks ({columns}, series_id, occurrence_ts)
+            SELECT {archived_columns}, series.id, CASE WHEN series.id IS NOT NULL THEN archived.occurrence_ts END
+            FROM archive.tasks AS archived LEFT JOIN main.task_series AS series ON series.id = archived.series_id
+            WHERE archived.term IN ({marks})
+            """,
+            terms
+        )
+    with conn:
+        conn.execute(
+            f"DELETE FROM archive.tasks WHERE term IN ({marks}) AND id IN (SELECT id FROM main.tasks)", terms
+        )
+    return cursor.rowcount
+
+
+def fetch_archive_counts():
+    # [(term, archived tasks)]
+    return attach_archive().execute(
+        "SELECT term, COUNT(*) FROM archive.tasks GROUP BY term ORDER BY term"
+    ).fetchall()
+
+# ---------------------------------------------
+# SNAPSHOT
+# ---------------------------------------------
+# the task list of the last full load, kept next to the database so the next
+# start can skip the queries and row building when nothing changed. PRAGMA
+# data_version only means something within one connection, so the snapshot
+# is keyed on the change-feed position instead, which every task and series
+# write moves.
+def snapshot_path(username):
+    name = hashlib.sha1(repr(username).encode("utf-8")).hexdigest()[:16]
+    return DB_PATH.with_name(f"{DB_PATH.stem}_snapshots") / f"tasks-{name}.bin"
+
+
+def snapshot_key(username, window, seq):
+    # everything the loaded list depends on; any difference means a real load
+    enrollments = tuple(fetch_enrollments(username)) if username is not None else ()
+    return (SNAPSHOT_FORMAT, sys.version_info[:2], SCHEMA_VERSION, seq, username,
+            None if window is None else tuple(window), enrollments)
+
+
+def load_task_snapshot(username=None, window=None, seq=None):
+    # what fetch_all_tasks(username, window) returned when the snapshot was
+    # saved, or None when it is missing, unreadable or out of date. seq is
+    # the latest_task_change() the caller read before deciding to load.
+    seq = latest_task_change() if seq is None else seq
+    with metrics.timer("snapshot load"):
+        try:
+            # one read() then loads(): marshal.load on a file reads in tiny pieces
+            with open(snapshot_path(username), "rb") as file:
+                key, rows = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if key != snapshot_key(username, window, seq):
+            return None
+        return snapshot_records(rows)
+
+
+def snapshot_records(rows):
+    # TaskRecords without __init__: marshal writes interned strings as such
+    # and interns them again on load, so the intern_text calls can be skipped
+    new = object.__new__
+    tasks = []
+    for row in rows:
+        task = new(TaskRecord)
+        (task.id, task.name, task.subject, task.section, task.course, task.year_level, task.instructor,
+         task.term, task.deadline, task.status, task.deadline_ts, task.version) = row
+        tasks.append(task)
+    return tasks
+
+
+def save_task_snapshot(tasks, username=None, window=None, seq=None):
+    # seq must be read before `tasks` were fetched: a write landing in between
+    # then only makes the snapshot look stale, never current when it is not
+    seq = latest_task_change() if seq is None else seq
+    path = snapshot_path(username)
+    temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(exist_ok=True)
+        with open(temp, "wb") as file:
+            marshal.dump((snapshot_key(username, window, seq),
+                          [tuple(value for _, value in task.items()) for task in tasks]), file)
+        os.replace(temp, path)
+    except OSError:
+        # only an optimization; the next start simply loads from the database
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+# ---------------------------------------------
+# NOTIFICATIONS
+# ---------------------------------------------
+def fetch_notification_state(username):
+    # {task_id: (stage, snoozed_until, acknowledged)} for everything shown to username
+    cursor = get_connection().execute(
+        "SELECT task_id, stage, snoozed_until, acknowledged FROM task_notifications WHERE username = ?",
+        (username,)
+    )
+    return {row[0]: (row[1], row[2], bool(row[3])) for row in cursor}
+
+
+def fetch_due_notifications(username, now, start_ts=None, scope=None, window=None):
+    # pending tasks (within `scope`'s enrollments) whose next stage is due for
+    # username: never shown, or next_due_ts reached. Returns [(task, stage)].
+    # Recurring occurrences are only generated inside window.
+    source, where, params = scoped_tasks(scope)
+    columns = ", ".join(f"tasks.{column}" for column in TASK_COLUMNS)
+    query = f"""
+        SELECT {columns} FROM {source}
+        LEFT JOIN task_notifications ON task_notifications.username = ? AND task_notifications.task_id = tasks.id
+        WHERE {where} AND tasks.status = 'Pending' AND tasks.deadline_ts IS NOT NULL
+        AND tasks.deadline_ts <= ?
+        AND (task_notifications.task_id IS NULL OR task_notifications.next_due_ts <= ?)
+    """
+    params = [username] + params + [now + REMINDER_STAGES[0][0], now]
+    if start_ts is not None:
+        query += " AND tasks.deadline_ts >= ?"
+        params.append(start_ts)
+    query += " ORDER BY tasks.deadline_ts, tasks.id"
+    due = []
+    for row in get_connection().execute(query, params):
+        task = task_from_row(row)
+        due.append((task, reminder_stage(task["deadline_ts"], now)))
+    if window is None:
+        return due
+    low = window[0] if start_ts is None else max(window[0], start_ts)
+    high = min(window[1], now + REMINDER_STAGES[0][0])
+    occurrences = list(iter_window_occurrences((low, high), scope))
+    if occurrences:
+        # occurrences have no row to join against; their state sits under
+        # their (negative) virtual ids
+        next_due = dict(get_connection().execute(
+            "SELECT task_id, next_due_ts FROM task_notifications WHERE username = ? AND task_id < 0", (username,)
+        ))
+        for task in occurrences:
+            if task["id"] not in next_due or (next_due[task["id"]] is not None and next_due[task["id"]] <= now):
+                due.append((task, reminder_stage(task["deadline_ts"], now)))
+    due.sort(key=lambda item: (item[0]["deadline_ts"], item[0]["id"]))
+    return due
+
+
+@retry_when_locked
+def record_notifications(username, shown, now):
+    # shown: (task_id, stage, deadline_ts) for reminders just displayed
+    rows = []
+    for task_id, stage, deadline_ts in shown:
+        next_due = None
+        if stage + 1 < len(REMINDER_STAGES):
+            next_due = deadline_ts - REMINDER_STAGES[stage + 1][0]
+        rows.append((username, task_id, stage, int(now), next_due))
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO task_notifications (username, task_id, stage, notified_at, next_due_ts)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (username, task_id) DO UPDATE SET
+                stage = excluded.stage,
+                notified_at = excluded.notified_at,
+                snoozed_until = NULL,
+                next_due_ts = excluded.next_due_ts
+            """,
+            rows
+        )
+
+
+@retry_when_locked
+def snooze_notifications(username, task_ids, until_ts):
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            """
+            UPDATE task_notifications SET snoozed_until = ?, next_due_ts = ?
+            WHERE username = ? AND task_id = ?
+            """,
+            [(until_ts, until_ts, username, task_id) for task_id in task_ids]
+        )
+
+
+@retry_when_locked
+def acknowledge_notifications(username, task_ids):
+    # no further reminders until the task's deadline or status changes
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            """
+            UPDATE task_notifications SET acknowledged = 1, snoozed_until = NULL, next_due_ts = NULL
+            WHERE username = ? AND task_id = ?
+            """,
+            [(username, task_id) for task_id in task_ids]
+        )
+
+# ---------------------------------------------
+# SEARCH
+# ---------------------------------------------
+def search_terms(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def has_search_index():
+    # False on SQLite builds without FTS5, see create_search_index
+    return get_connection().execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).fetchone() is not None
+
+
+def search_tasks(text="", filters=None, offset=0, limit=100):
+    # every word of `text` must prefix-match name, subject or instructor;
+    # matches come back best first (bm25), otherwise in deadline order.
+    # Archived tasks are not in the FTS index, so include_archive searches
+    # take the LIKE path.
+    filters = filters or {}
+    where, params = task_filter_clause(filters)
+    columns = ", ".join(f"tasks.{column}" for column in TASK_COLUMNS)
+    terms = search_terms(text)
+    conn = get_connection()
+    if terms and has_search_index() and not filters.get("include_archive"):
+        match = " ".join(f'"{term}"*' for term in terms)
+        # the capped count stops early, so a broad prefix costs no more than a
+        # narrow one; only small hit sets are scored with bm25
+        hits = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM tasks_fts WHERE tasks_fts MATCH ? LIMIT ?)",
+            (match, SEARCH_RANK_LIMIT + 1)
+        ).fetchone()[0]
+        if hits > SEARCH_RANK_LIMIT:
+            order = "tasks_fts.rowid DESC"
+        else:
+            order = f"bm25(tasks_fts, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)}), tasks.id"
+        # CROSS JOIN keeps the FTS index as the outer loop; otherwise the
+        # planner may walk idx_tasks_filters and run MATCH once per row
+        query = f"""
+            SELECT {columns} FROM tasks_fts CROSS JOIN tasks ON tasks.id = tasks_fts.rowid
+            WHERE tasks_fts MATCH ? AND {where}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        """
+        params = [match] + params
+    else:
+        for term in terms:
+            where += " AND (" + " OR ".join(f"tasks.{column} LIKE ?" for column in SEARCH_COLUMNS) + ")"
+            params.extend([f"%{term}%"] * len(SEARCH_COLUMNS))
+        query = f"SELECT {columns} FROM {task_source(filters)} WHERE {where} ORDER BY deadline_ts, id LIMIT ? OFFSET ?"
+    cursor = conn.execute(query, params + [limit, offset])
+    return [task_from_row(row) for row in cursor]
+
+# ---------------------------------------------
+# DEADLINE HELPERS
+# ---------------------------------------------
+def parse_deadline(deadline):
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return datetime.datetime.strptime(deadline, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def deadline_timestamp(deadline):
+    deadline_dt = parse_deadline(deadline)
+    return int(deadline_dt.timestamp()) if deadline_dt is not None else None
+
+
+def format_deadline(deadline_ts):
+    return datetime.datetime.fromtimestamp(deadline_ts).strftime(DEADLINE_FORMATS[0])
+
+
+def reminder_stage(deadline_ts, now):
+    # index into REMINDER_STAGES of the latest stage already reached, or None
+    stage = None
+    for index, (seconds_before, _title) in enumerate(REMINDER_STAGES):
+        if deadline_ts - seconds_before <= now:
+            stage = index
+    return stage
@@ -0,0 +1,167 @@
+# Student Schedule Reminder - timing and counting hooks
+# Everything here is a no-op until enable() is called, so the hooks can stay
+# in the hot paths for good. configure_from_env() switches collection on with
+# SCHEDULE_METRICS=1 and the rotating file with SCHEDULE_METRICS_FILE=<path>.
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from pathlib import Path
+
+# upper bounds in milliseconds; the last bucket catches everything slower
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+METRICS_FILE = Path(__file__).with_name("schedule_metrics.log")
+METRICS_FILE_MAX_BYTES = 1000000
+METRICS_FILE_BACKUPS = 3
+
+enabled = False
+
+_lock = threading.Lock()
+# name -> [calls, total_ms, max_ms, bucket counts]
+_histograms = {}
+_counters = {}
+_file_logger = None
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def configure_from_env():
+    if os.environ.get("SCHEDULE_METRICS", "") not in ("", "0"):
+        enable()
+    path = os.environ.get("SCHEDULE_METRICS_FILE")
+    if path:
+        start_file(path)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def observe(name, elapsed_ms):
+    if not enabled:
+        return
+    bucket = bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = [0, 0.0, 0.0, [0] * (len(BUCKET_BOUNDS_MS) + 1)]
+        histogram[0] += 1
+        histogram[1] += elapsed_ms
+        if elapsed_ms > histogram[2]:
+            histogram[2] = elapsed_ms
+        histogram[3][bucket] += 1
+
+
+def count(name, amount=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    # with metrics.timer("tk refresh_task_table"): ...
+    return _Timer(name) if enabled else _NULL_TIMER
+
+
+def percentile(buckets, calls, fraction):
+    # upper bound of the bucket holding the requested rank; None past the last bound
+    if not calls:
+        return 0.0
+    rank = fraction * calls
+    seen = 0
+    for index, bucket_count in enumerate(buckets):
+        seen += bucket_count
+        if seen >= rank:
+            return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else None
+    return None
+
+
+def snapshot():
+    with _lock:
+        histograms = {name: (calls, total, peak, list(buckets))
+                      for name, (calls, total, peak, buckets) in _histograms.items()}
+        counters = dict(_counters)
+    report = {"time": int(time.time()), "histograms": {}, "counters": counters}
+    for name, (calls, total, peak, buckets) in histograms.items():
+        report["histograms"][name] = {
+            "calls": calls,
+            "total_ms": round(total, 3),
+            "max_ms": round(peak, 3),
+            "p50_ms": percentile(buckets, calls, 0.5),
+            "p95_ms": percentile(buckets, calls, 0.95),
+            "buckets": buckets,
+        }
+    return report
+
+
+# ---------------------------------------------
+# METRICS FILE
+# ---------------------------------------------
+def start_file(path=METRICS_FILE, max_bytes=METRICS_FILE_MAX_BYTES, backups=METRICS_FILE_BACKUPS):
+    # one JSON snapshot per line, rotated to path.1 .. path.N when it fills up
+    global _file_logger
+    stop_file()
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                   encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("schedule.metrics")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    _file_logger = logger
+
+
+def stop_file():
+    global _file_logger
+    if _file_logger is None:
+        return
+    for handler in list(_file_logger.handlers):
+        _file_logger.removeHandler(handler)
+        handler.close()
+    _file_logger = None
+
+
+def file_active():
+    return _file_logger is not None
+
+
+def write_snapshot():
+    if _file_logger is not None:
+        _file_logger.info(json.dumps(snapshot(), separators=(",", ":")))
@@ -0,0 +1,678 @@
+# Student Schedule Reminder - local JSON API server
+# Optional asyncio HTTP service in front of schedule.db, so many GUI instances
+# share one set of connections instead of each opening the file:
+#   python schedule_server.py --port 8765
+#   SCHEDULE_SERVER=http://127.0.0.1:8765 python "Simple Student Schedule Reminder.py"
+# Task reads carry an ETag and answer If-None-Match with 304 while nothing
+# they depend on changed, /tasks/changes serves deltas from the change feed,
+# and /batch runs several writes in one request. Only the operations listed
+# in WRITE_OPERATIONS can be called, and students only ever see their own
+# enrollments whatever they ask for.
+import argparse
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import schedule_db as db
+import schedule_metrics as metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# reads run side by side on their own connections; writes go through one
+# thread in arrival order, like the GUI's DbWorker
+READ_THREADS = 4
+KEEPALIVE_SECONDS = 60
+SESSION_IDLE_SECONDS = 12 * 3600
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_HEADER_LINES = 100
+MAX_PAGE_ROWS = 5000
+MANAGER_ROLES = {"admin", "instructor"}
+TASK_STATUSES = ("Pending", "Completed")
+REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+    404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------------------------
+# SESSIONS
+# ---------------------------------------------
+# token -> {"username", "role", "seen"}
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def open_session(user):
+    token = secrets.token_urlsafe(24)
+    now = time.time()
+    with _sessions_lock:
+        for stale in [key for key, session in _sessions.items() if now - session["seen"] > SESSION_IDLE_SECONDS]:
+            del _sessions[stale]
+        _sessions[token] = {"username": user["username"], "role": user["role"], "seen": now}
+    return token
+
+
+def find_session(headers):
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise ApiError(401, "Log in first.")
+    now = time.time()
+    with _sessions_lock:
+        session = _sessions.get(token)
+        if session is None or now - session["seen"] > SESSION_IDLE_SECONDS:
+            _sessions.pop(token, None)
+            raise ApiError(401, "Session expired; log in again.")
+        session["seen"] = now
+    return session
+
+
+def is_manager(session):
+    return session["role"] in MANAGER_ROLES
+
+
+def require_manager(session):
+    if not is_manager(session):
+        raise ApiError(403, "Only instructors/admins can do that.")
+
+
+def require_self_or_manager(session, username):
+    if username != session["username"]:
+        require_manager(session)
+
+
+def scope_for(session, query):
+    # managers may ask for one student's view (or everything with no
+    # username); a student's requests are always limited to themselves
+    if is_manager(session):
+        return query_text(query, "username") or None
+    return session["username"]
+
+# ---------------------------------------------
+# REQUEST ARGUMENTS
+# ---------------------------------------------
+def query_text(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def query_int(query, name, default=None):
+    value = query_text(query, name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be a whole number.") from None
+
+
+def query_limit(query, default=100):
+    return max(0, min(query_int(query, "limit", default), MAX_PAGE_ROWS))
+
+
+def query_key(query, name):
+    # page keys travel as "<deadline_ts>,<id>"; an empty deadline_ts is None
+    value = query_text(query, name)
+    if value is None:
+        return None
+    deadline_ts, _, task_id = value.partition(",")
+    try:
+        return (int(deadline_ts) if deadline_ts else None), int(task_id)
+    except ValueError:
+        raise ApiError(400, f"{name} must look like <deadline_ts>,<id>.") from None
+
+
+def query_window(query):
+    # recurring occurrences are expanded in "<start_ts>,<end_ts>"; none without it
+    value = query_text(query, "window")
+    if not value:
+        return None
+    start_ts, _, end_ts = value.partition(",")
+    try:
+        return int(start_ts), int(end_ts)
+    except ValueError:
+        raise ApiError(400, "window must look like <start_ts>,<end_ts>.") from None
+
+
+def query_filters(query):
+    filters = {column: query_text(query, column, "") for column in db.FILTER_COLUMNS}
+    filters["deadline_from"] = query_int(query, "deadline_from")
+    filters["deadline_to"] = query_int(query, "deadline_to")
+    filters["include_archive"] = bool(query_text(query, "include_archive"))
+    return filters
+
+
+def task_rows(tasks):
+    # tasks travel as lists in TASK_COLUMNS order, not one object per task
+    return [[value for _, value in task.items()] for task in tasks]
+
+# ---------------------------------------------
+# READS
+# ---------------------------------------------
+def read_status(session, query, body):
+    return {"schema_version": db.SCHEMA_VERSION, "columns": db.TASK_COLUMNS}
+
+
+def login(session, query, body):
+    if not isinstance(body, dict) or not isinstance(body.get("username"), str) \
+            or not isinstance(body.get("password"), str):
+        raise ApiError(400, "Send a JSON object with username and password.")
+    user = db.authenticate(body["username"], body["password"])
+    if user is None:
+        raise ApiError(401, "Invalid username or password.")
+    return {"token": open_session(user), "user": user, "schema_version": db.SCHEMA_VERSION}
+
+
+def read_tasks(session, query, body):
+    scope = scope_for(session, query)
+    ids = query_text(query, "ids")
+    if ids is None:
+        return task_rows(db.fetch_all_tasks(scope, query_window(query)))
+    try:
+        task_ids = [int(part) for part in ids.split(",") if part]
+    except ValueError:
+        raise ApiError(400, "ids must be a comma separated list of task ids.") from None
+    found = db.fetch_tasks(task_ids[:MAX_PAGE_ROWS])
+    if scope is not None:
+        found = [task for task in found if db.task_visible_to(task["id"], scope)]
+    return task_rows(found)
+
+
+def read_task(session, query, body, task_id):
+    scope = scope_for(session, query)
+    task = db.fetch_task(int(task_id))
+    if task is None or (scope is not None and not db.task_visible_to(task["id"], scope)):
+        raise ApiError(404, f"No task {task_id}.")
+    return task_rows([task])[0]
+
+
+def read_task_page(session, query, body):
+    return task_rows(db.fetch_task_page(
+        after=query_key(query, "after"), before=query_key(query, "before"),
+        limit=query_limit(query), username=scope_for(session, query), window=query_window(query)
+    ))
+
+
+def read_counts(session, query, body):
+    return list(db.count_tasks(scope_for(session, query), query_window(query)))
+
+
+def read_summary(session, query, body, dimension):
+    return db.fetch_task_summary(dimension, scope_for(session, query), query_window(query))
+
+
+def read_latest_change(session, query, body):
+    return {"seq": db.latest_task_change()}
+
+
+def read_task_changes(session, query, body):
+    # the delta endpoint; "reset" means the feed was pruned past `since` or a
+    # recurring series changed, and the client has to reload everything
+    changes = db.fetch_task_changes(query_int(query, "since", 0), scope_for(session, query))
+    if changes is None:
+        return {"reset": True}
+    latest_seq, changed, deleted = changes
+    return {"seq": latest_seq, "changed": task_rows(changed), "deleted": sorted(deleted)}
+
+
+def read_pending_deadlines(session, query, body):
+    return db.fetch_pending_deadlines(query_int(query, "start"), query_int(query, "end"),
+                                      scope_for(session, query), query_window(query))
+
+
+def read_search(session, query, body):
+    filters = query_filters(query)
+    filters["enrolled_user"] = scope_for(session, query)
+    return task_rows(db.search_tasks(query_text(query, "q", ""), filters,
+                                     query_int(query, "offset", 0), query_limit(query)))
+
+
+def read_export(session, query, body):
+    # keyset pages of export rows; count=1 asks for the total instead
+    require_manager(session)
+    filters = query_filters(query)
+    if query_text(query, "count"):
+        return {"count": db.count_matching_tasks(filters)}
+    return db.fetch_task_batch(filters, query_int(query, "after_id", 0), query_limit(query, MAX_PAGE_ROWS))
+
+
+def read_archive_counts(session, query, body):
+    require_manager(session)
+    return db.fetch_archive_counts()
+
+
+def read_archivable(session, query, body):
+    require_manager(session)
+    terms = [term for term in query_text(query, "terms", "").split(",") if term]
+    return {"count": db.count_archivable_tasks(terms, query_int(query, "completed_before"))}
+
+
+def read_notifications(session, query, body):
+    state = db.fetch_notification_state(session["username"])
+    return [[task_id] + list(values) for task_id, values in state.items()]
+
+
+def read_user(session, query, body, username):
+    require_self_or_manager(session, username)
+    user = db.fetch_user(username)
+    if user is None:
+        raise ApiError(404, f"No user named '{username}'.")
+    return user
+
+
+def read_usernames(session, query, body):
+    require_manager(session)
+    return db.fetch_usernames(query_text(query, "prefix", ""), query_text(query, "role"), query_limit(query, 50))
+
+
+def read_enrollments(session, query, body, username):
+    require_self_or_manager(session, username)
+    return db.fetch_enrollments(username)
+
+
+def read_metrics(session, query, body):
+    if session["role"] != "admin":
+        raise ApiError(403, "Only admins can read server metrics.")
+    return metrics.snapshot()
+
+
+def task_etag(session, query, target):
+    # everything the cached reads return follows the task change feed, plus
+    # the enrollments of whoever they are scoped to. The validator is read
+    # before the data, so a write landing in between costs one extra
+    # download later, never a stale 304.
+    scope = scope_for(session, query)
+    digest = hashlib.sha1(f"{target}\n{scope}".encode("utf-8"))
+    if scope is not None:
+        digest.update(repr(db.fetch_enrollments(scope)).encode("utf-8"))
+    return f'W/"{db.latest_task_change()}-{digest.hexdigest()[:16]}"'
+
+
+def cached_read(handler, session, query, body, groups, target, if_none_match):
+    etag = task_etag(session, query, target)
+    if if_none_match == etag:
+        return 304, etag, None
+    return 200, etag, handler(session, query, body, *groups)
+
+# ---------------------------------------------
+# WRITES
+# ---------------------------------------------
+# each takes the session plus the JSON "args" list of one batch entry
+def op_insert_task(session, task):
+    require_manager(session)
+    return db.insert_task(task)
+
+
+def op_insert_tasks(session, rows):
+    require_manager(session)
+    db.insert_tasks([tuple(row) for row in rows])
+    return len(rows)
+
+
+def op_update_task(session, task_id, fields, expected_version=None):
+    require_manager(session)
+    return db.update_task(task_id, fields, expected_version)
+
+
+def op_set_task_status(session, task_id, status):
+    # students may tick off their own tasks, as in the GUI
+    if status not in TASK_STATUSES:
+        raise ApiError(400, f"status must be one of {', '.join(TASK_STATUSES)}.")
+    if not is_manager(session) and not db.task_visible_to(task_id, session["username"]):
+        raise ApiError(403, f"Task {task_id} is not in your enrollments.")
+    db.set_task_status(task_id, status)
+
+
+def op_delete_task(session, task_id):
+    require_manager(session)
+    db.delete_task(task_id)
+
+
+def op_insert_series(session, series):
+    require_manager(session)
+    return db.insert_series(series)
+
+
+def op_materialize_occurrence(session, task_id, fields):
+    # students may only complete an occurrence of their own, as with set_task_status
+    if not is_manager(session):
+        if set(fields) != {"status"}:
+            raise ApiError(403, "Only instructors/admins can edit tasks.")
+        if not db.task_visible_to(task_id, session["username"]):
+            raise ApiError(403, f"Task {task_id} is not in your enrollments.")
+    if "status" in fields and fields["status"] not in TASK_STATUSES:
+        raise ApiError(400, f"status must be one of {', '.join(TASK_STATUSES)}.")
+    stored = db.materialize_occurrence(task_id, fields)
+    return task_rows([stored])[0] if stored is not None else None
+
+
+def op_delete_series(session, series_id):
+    require_manager(session)
+    db.delete_series(series_id)
+
+
+def op_archive_tasks(session, terms, completed_before=None):
+    require_manager(session)
+    return db.archive_tasks(terms, completed_before)
+
+
+def op_restore_archived_tasks(session, terms):
+    require_manager(session)
+    return db.restore_archived_tasks(terms)
+
+
+def op_enroll_user(session, username, section, course, year_level):
+    require_manager(session)
+    db.enroll_user(username, section, course, year_level)
+
+
+def op_unenroll_user(session, username, section, course, year_level):
+    require_manager(session)
+    db.unenroll_user(username, section, course, year_level)
+
+
+def op_record_notifications(session, shown, now):
+    db.record_notifications(session["username"], [tuple(item) for item in shown], now)
+
+
+def op_snooze_notifications(session, task_ids, until_ts):
+    db.snooze_notifications(session["username"], task_ids, until_ts)
+
+
+def op_acknowledge_notifications(session, task_ids):
+    db.acknowledge_notifications(session["username"], task_ids)
+
+
+WRITE_OPERATIONS = {
+    "insert_task": op_insert_task,
+    "insert_tasks": op_insert_tasks,
+    "update_task": op_update_task,
+    "set_task_status": op_set_task_status,
+    "delete_task": op_delete_task,
+    "insert_series": op_insert_series,
+    "materialize_occurrence": op_materialize_occurrence,
+    "delete_series": op_delete_series,
+    "archive_tasks": op_archive_tasks,
+    "restore_archived_tasks": op_restore_archived_tasks,
+    "enroll_user": op_enroll_user,
+    "unenroll_user": op_unenroll_user,
+    "record_notifications": op_record_notifications,
+    "snooze_notifications": op_snooze_notifications,
+    "acknowledge_notifications": op_acknowledge_notifications,
+}
+
+
+def run_batch(session, query, body):
+    # {"ops": [{"op": name, "args": [...]}, ...]} runs in order on the write
+    # thread. Each op commits on its own; the batch stops at the first
+    # failure and reports its index next to the results that went through.
+    ops = body.get("ops") if isinstance(body, dict) else None
+    if not isinstance(ops, list) or not ops:
+        raise ApiError(400, 'Send {"ops": [{"op": ..., "args": [...]}, ...]}.')
+    for op in ops:
+        if not isinstance(op, dict) or op.get("op") not in WRITE_OPERATIONS \
+                or not isinstance(op.get("args", []), list):
+            raise ApiError(400, f"Unsupported operation: {op!r}")
+
+    results = []
+    for index, op in enumerate(ops):
+        try:
+            results.append(WRITE_OPERATIONS[op["op"]](session, *op.get("args", [])))
+        except Exception as exc:
+            status, message = error_status(exc)
+            return {"results": results, "error": {"index": index, "status": status, "message": message}}
+    metrics.count("api batched writes", len(ops))
+    return {"results": results}
+
+# ---------------------------------------------
+# ROUTES
+# ---------------------------------------------
+# (method, path, handler, kind): "public" needs no session, "cached" reads
+# are revalidated with ETags, "write" runs on the single write thread
+ROUTES = tuple((method, re.compile(path), handler, kind) for method, path, handler, kind in (
+    ("GET", r"/status", read_status, "public"),
+    ("POST", r"/login", login, "public"),
+    ("GET", r"/tasks", read_tasks, "cached"),
+    ("GET", r"/tasks/page", read_task_page, "cached"),
+    ("GET", r"/tasks/counts", read_counts, "cached"),
+    ("GET", r"/tasks/summary/([^/]+)", read_summary, "cached"),
+    ("GET", r"/tasks/search", read_search, "cached"),
+    ("GET", r"/tasks/pending", read_pending_deadlines, "cached"),
+    ("GET", r"/tasks/latest", read_latest_change, "read"),
+    ("GET", r"/tasks/changes", read_task_changes, "read"),
+    ("GET", r"/tasks/export", read_export, "read"),
+    ("GET", r"/tasks/(-?\d+)", read_task, "cached"),
+    ("GET", r"/archive", read_archive_counts, "read"),
+    ("GET", r"/archive/preview", read_archivable, "read"),
+    ("GET", r"/notifications", read_notifications, "read"),
+    ("GET", r"/users", read_usernames, "read"),
+    ("GET", r"/users/([^/]+)", read_user, "read"),
+    ("GET", r"/users/([^/]+)/enrollments", read_enrollments, "read"),
+    ("GET", r"/metrics", read_metrics, "read"),
+    ("POST", r"/batch", run_batch, "write"),
+))
+
+
+def error_status(exc):
+    if isinstance(exc, ApiError):
+        return exc.status, str(exc)
+    if isinstance(exc, (ValueError, TypeError, KeyError)):
+        return 400, f"Bad arguments: {exc}"
+    if isinstance(exc, sqlite3.Error):
+        return 500, f"Database error: {exc}"
+    traceback.print_exc()
+    return 500, "Internal server error."
+
+
+async def dispatch(pools, method, target, headers, body):
+    # returns (status, etag, payload)
+    parts = urlsplit(target)
+    path = parts.path.rstrip("/") or "/"
+    allowed = []
+    for route_method, pattern, handler, kind in ROUTES:
+        match = pattern.fullmatch(path)
+        if match is None:
+            continue
+        allowed.append(route_method)
+        if route_method == method:
+            break
+    else:
+        if allowed:
+            raise ApiError(405, f"{path} only accepts {', '.join(allowed)}.")
+        raise ApiError(404, f"No such endpoint: {path}")
+
+    session = None if kind == "public" else find_session(headers)
+    query = parse_qs(parts.query)
+    data = None
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ApiError(400, "The request body must be JSON.") from None
+    groups = [unquote(group) for group in match.groups()]
+    read_pool, write_pool = pools
+    loop = asyncio.get_running_loop()
+    with metrics.timer(f"api {handler.__name__}"):
+        if kind == "cached":
+            return await loop.run_in_executor(read_pool, cached_read, handler, session, query, data, groups,
+                                              target, headers.get("if-none-match"))
+        pool = write_pool if kind == "write" else read_pool
+        return 200, None, await loop.run_in_executor(pool, handler, session, query, data, *groups)
+
+# ---------------------------------------------
+# HTTP
+# ---------------------------------------------
+async def read_request(reader):
+    # (method, target, headers, body), or None once the client hangs up
+    try:
+        line = await asyncio.wait_for(reader.readline(), KEEPALIVE_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(400, "Malformed request line.") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADER_LINES:
+            raise ApiError(400, "Too many headers.")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise ApiError(400, "Bad Content-Length.") from None
+    if length > MAX_BODY_BYTES:
+        raise ApiError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes.")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), target, headers, body
+
+
+def encode_response(status, payload, etag=None, keep_alive=True):
+    body = b"" if status == 304 else json.dumps(payload, separators=(",", ":"), default=list).encode("utf-8")
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}"]
+    if status != 304:
+        lines.append("Content-Type: application/json")
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append("Cache-Control: no-cache")
+    if etag:
+        lines.append(f"ETag: {etag}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def serve_connection(reader, writer, pools):
+    # HTTP/1.1 with keep-alive, one request at a time per connection
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except ApiError as exc:
+                writer.write(encode_response(exc.status, {"error": str(exc)}, keep_alive=False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, target, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            try:
+                status, etag, payload = await dispatch(pools, method, target, headers, body)
+            except Exception as exc:
+                status, message = error_status(exc)
+                etag, payload = None, {"error": message}
+            if status == 304:
+                metrics.count("api not modified")
+            writer.write(encode_response(status, payload, etag, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except asyncio.CancelledError:
+        # shutting down with the client still connected
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, on_ready=None):
+    # runs until cancelled; on_ready(port) is called once the socket listens
+    read_pool = concurrent.futures.ThreadPoolExecutor(READ_THREADS, thread_name_prefix="api-read")
+    write_pool = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="api-write")
+    pools = (read_pool, write_pool)
+    db.init_db()
+
+    async def handle(reader, writer):
+        await serve_connection(reader, writer, pools)
+
+    try:
+        server = await asyncio.start_server(handle, host, port)
+        async with server:
+            if on_ready is not None:
+                on_ready(server.sockets[0].getsockname()[1])
+            await server.serve_forever()
+    finally:
+        read_pool.shutdown(wait=False, cancel_futures=True)
+        write_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def start_in_thread(host=DEFAULT_HOST, port=0):
+    # for end-to-end checks on localhost: serves from a daemon thread and
+    # returns (url, stop); port 0 picks a free port
+    ready = threading.Event()
+    started = []
+    failed = []
+
+    def on_ready(actual_port):
+        started.append((actual_port, asyncio.get_running_loop(), asyncio.current_task()))
+        ready.set()
+
+    def run():
+        try:
+            asyncio.run(serve(host, port, on_ready))
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            failed.append(exc)
+            ready.set()
+
+    thread = threading.Thread(target=run, name="api-server", daemon=True)
+    thread.start()
+    if not ready.wait(10):
+        raise RuntimeError("The API server did not start.")
+    if failed:
+        raise failed[0]
+    actual_port, loop, serve_task = started[0]
+
+    def stop():
+        # asyncio.run then cancels the open connections before closing the loop
+        loop.call_soon_threadsafe(serve_task.cancel)
+        thread.join(10)
+
+    return f"http://{host}:{actual_port}", stop
+
+# ---------------------------------------------
+# MAIN
+# ---------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="schedule_server", description="Serve schedule.db over local HTTP/JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to bind (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--db", help="database file (default schedule.db next to this script)")
+    args = parser.parse_args(argv)
+
+    metrics.configure_from_env()
+    if args.db:
+        db.set_db_path(args.db)
+
+    def ready(port):
+        print(f"Serving {db.DB_PATH} on http://{args.host}:{port} (Ctrl+C to stop)")
+
+    try:
+        asyncio.run(serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# Student Schedule Reminder - background database worker
+import queue
+import threading
+
+import schedule_db as db
+
+WORKER_POLL_MS = 30
+
+
+class DbWorker:
+    # Runs database jobs one at a time on a background thread so the Tk
+    # mainloop never waits on SQLite. A single thread keeps writes in the order
+    # they were submitted; results are handed back to the Tk thread by pump(),
+    # which polls with after() only while jobs are in flight.
+
+    def __init__(self, root, on_error=None, on_busy=None, poll_ms=WORKER_POLL_MS):
+        self.root = root
+        self.on_error = on_error
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+        self.in_flight = 0
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._timer = None
+        self._thread = threading.Thread(target=self._run, name="db-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        self.in_flight += 1
+        self._notify_busy()
+        self._jobs.put((func, args, on_done, on_error))
+        if self._timer is None:
+            self._timer = self.root.after(self.poll_ms, self.pump)
+
+    def post(self, callback, *args):
+        # safe from any thread: runs callback(*args) on the Tk thread
+        self._results.put((False, callback, args))
+
+    def stop(self):
+        self._jobs.put(None)
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def pump(self):
+        self._timer = None
+        try:
+            while True:
+                try:
+                    finished, callback, args = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if finished:
+                    self.in_flight -= 1
+                    self._notify_busy()
+                if callback is not None:
+                    callback(*args)
+        finally:
+            if self.in_flight and self._timer is None:
+                self._timer = self.root.after(self.poll_ms, self.pump)
+
+    def _notify_busy(self):
+        if self.on_busy is not None:
+            self.on_busy(self.in_flight)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            func, args, on_done, on_error = job
+            try:
+                result = func(*args)
+            except Exception as exc:
+                self._results.put((True, on_error or self.on_error, (exc,)))
+            else:
+                self._results.put((True, on_done, (result,)))
+        db.close_connection()
@@ -0,0 +1,166 @@
+# Student Schedule Reminder - concurrent writer stress test
+# Starts several processes that edit, complete, add and delete tasks in one
+# scratch copy of schedule.db at the same time, then checks that no write was
+# lost and that the counters, search index and file are still consistent:
+#   python stressfordb.py --writers 8 --ops 300
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import schedule_db as db
+
+CAS_ATTEMPTS = 10
+
+
+def make_task(rng, label):
+    deadline_ts = int(time.time()) + rng.randint(-86400, 86400 * 30) // 900 * 900
+    return {
+        "name": label,
+        "subject": rng.choice(("Math", "Physics", "English", "Programming")),
+        "section": rng.choice(("A", "B", "C")),
+        "course": "BSIT",
+        "year_level": str(rng.randint(1, 4)),
+        "instructor": "Prof Stress",
+        "term": rng.choice(("Prelim", "Midterm", "Prefinals", "Finals")),
+        "deadline": time.strftime(db.DEADLINE_FORMATS[0], time.localtime(deadline_ts)),
+        "status": "Pending",
+        "deadline_ts": deadline_ts,
+    }
+
+
+def writer(index, path, task_ids, ops, seed, start_at):
+    # returns what this process changed so the parent can check the totals
+    db.set_db_path(path)
+    rng = random.Random(seed * 1000 + index)
+    bumps = {}
+    inserted = []
+    deleted = []
+    conflicts = 0
+    gave_up = 0
+    errors = []
+    time.sleep(max(start_at - time.time(), 0))
+    for op in range(ops):
+        roll = rng.random()
+        try:
+            if roll < 0.6:
+                # an edit as the GUI does it: read, change, compare-and-swap
+                task_id = rng.choice(task_ids)
+                for _ in range(CAS_ATTEMPTS):
+                    task = db.fetch_task(task_id)
+                    if db.update_task(task_id, {"name": f"w{index} edit {op}"}, task["version"]) is not None:
+                        bumps[task_id] = bumps.get(task_id, 0) + 1
+                        break
+                    conflicts += 1
+                else:
+                    gave_up += 1
+            elif roll < 0.8:
+                task_id = rng.choice(task_ids)
+                db.set_task_status(task_id, rng.choice(("Pending", "Completed")))
+                bumps[task_id] = bumps.get(task_id, 0) + 1
+            elif roll < 0.95 or not inserted:
+                inserted.append(db.insert_task(make_task(rng, f"w{index} new {op}")))
+            else:
+                task_id = inserted.pop(rng.randrange(len(inserted)))
+                db.delete_task(task_id)
+                deleted.append(task_id)
+        except sqlite3.Error as exc:
+            errors.append(f"{type(exc).__name__}: {exc}")
+    db.close_connection()
+    return {"bumps": bumps, "inserted": inserted + deleted, "deleted": deleted,
+            "conflicts": conflicts, "gave_up": gave_up, "errors": errors}
+
+
+def check(path, task_ids, results):
+    db.set_db_path(path)
+    conn = db.get_connection()
+    problems = []
+
+    bumps = {}
+    for result in results:
+        for task_id, count in result["bumps"].items():
+            bumps[task_id] = bumps.get(task_id, 0) + count
+    versions = dict(conn.execute(
+        f"SELECT id, version FROM tasks WHERE id IN ({', '.join('?' * len(task_ids))})", task_ids
+    ).fetchall())
+    lost = [task_id for task_id in task_ids if versions.get(task_id) != 1 + bumps.get(task_id, 0)]
+    if lost:
+        problems.append(f"{len(lost)} tasks have the wrong version (lost or extra writes), e.g. id {lost[0]}")
+
+    expected = len(task_ids) + sum(len(result["inserted"]) - len(result["deleted"]) for result in results)
+    actual = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    if actual != expected:
+        problems.append(f"expected {expected} tasks, found {actual}")
+
+    summary = conn.execute("SELECT total, pending, completed FROM task_summary WHERE dimension = 'all'").fetchone()
+    counted = conn.execute(
+        "SELECT COUNT(*), SUM(status = 'Pending'), SUM(status = 'Completed') FROM tasks"
+    ).fetchone()
+    if tuple(summary) != tuple(counted):
+        problems.append(f"task_summary says {tuple(summary)}, the table has {tuple(counted)}")
+
+    if db.has_search_index():
+        try:
+            conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('integrity-check')")
+        except sqlite3.DatabaseError as exc:
+            problems.append(f"search index: {exc}")
+    integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    if integrity != "ok":
+        problems.append(f"integrity_check: {integrity}")
+    db.close_connection()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="stressfordb", description="Hammer schedule.db with concurrent writers.")
+    parser.add_argument("--writers", type=int, default=6, help="writer processes (default 6)")
+    parser.add_argument("--ops", type=int, default=200, help="operations per writer (default 200)")
+    parser.add_argument("--tasks", type=int, default=50,
+                        help="tasks shared by every writer; fewer means more conflicts (default 50)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="schedule_stress_") as scratch:
+        path = os.path.join(scratch, "schedule.db")
+        db.set_db_path(path)
+        db.init_db()
+        rng = random.Random(args.seed)
+        task_ids = [db.insert_task(make_task(rng, f"shared {number}")) for number in range(args.tasks)]
+        # children open their own connections; none may be inherited
+        db.close_connection()
+
+        started = time.time()
+        start_at = started + 1
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.writers) as pool:
+            results = pool.starmap(writer, [
+                (index, path, task_ids, args.ops, args.seed, start_at) for index in range(args.writers)
+            ])
+        elapsed = time.time() - start_at
+
+        writes = sum(sum(result["bumps"].values()) + len(result["inserted"]) + len(result["deleted"])
+                     for result in results)
+        print(f"{args.writers} writers x {args.ops} ops in {elapsed:.1f}s: {writes} writes committed, "
+              f"{sum(result['conflicts'] for result in results)} edit conflicts retried, "
+              f"{sum(result['gave_up'] for result in results)} edits abandoned")
+        errors = [error for result in results for error in result["errors"]]
+        for error in sorted(set(errors)):
+            print(f"  {errors.count(error)} x {error}")
+
+        problems = check(path, task_ids, results)
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if errors:
+            print("FAIL: some writes raised database errors")
+        if problems or errors:
+            return 1
+        print("OK: no lost updates; counters, search index and file are consistent.")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
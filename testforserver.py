@@ -0,0 +1,116 @@
+# Student Schedule Reminder - API server end-to-end check
+# Starts schedule_server.py on a free localhost port over a scratch database
+# and drives it through schedule_client the way the thin GUI does:
+#   python testforserver.py
+import os
+import sys
+import tempfile
+import time
+
+import schedule_client as client
+import schedule_db as db
+import schedule_metrics as metrics
+import schedule_server as server
+
+
+def make_task(name, section, deadline_ts):
+    return {
+        "name": name, "subject": "Programming", "section": section, "course": "BSIT", "year_level": "1",
+        "instructor": "Prof Cruz", "term": "Prelim", "status": "Pending", "deadline_ts": deadline_ts,
+        "deadline": time.strftime(db.DEADLINE_FORMATS[0], time.localtime(deadline_ts)),
+    }
+
+
+def expect(problems, ok, message):
+    if not ok:
+        problems.append(message)
+
+
+def main():
+    problems = []
+    metrics.enable()
+    with tempfile.TemporaryDirectory(prefix="schedule_server_") as scratch:
+        db.set_db_path(os.path.join(scratch, "schedule.db"))
+        db.init_db()
+        now = int(time.time()) // 900 * 900
+        db.enroll_user("student", "BSIT-1A", "BSIT", "1")
+
+        url, stop = server.start_in_thread()
+        try:
+            client.set_server_url(url)
+            client.init_db()
+            expect(problems, client.authenticate("admin", "wrong") is None, "a bad password logged in")
+            admin = client.authenticate("admin", db.DEFAULT_USERS["admin"]["password"])
+            expect(problems, admin is not None and admin["role"] == "admin", "admin could not log in")
+
+            # batched writes, then the same rows read back over HTTP
+            ids = client.batch([
+                ("insert_task", (make_task("Lab 1", "BSIT-1A", now + 3600),)),
+                ("insert_task", (make_task("Lab 2", "BSIT-1A", now + 7200),)),
+                ("insert_task", (make_task("Essay", "BSIT-1B", now + 86400),)),
+            ])
+            tasks = client.fetch_all_tasks()
+            expect(problems, [task["id"] for task in tasks] == ids, f"expected tasks {ids}, got {tasks}")
+            counts = client.count_tasks()
+            expect(problems, counts == (3, 3, 0), f"counts were {counts}")
+
+            # unchanged data revalidates with a 304 instead of a download
+            client.fetch_all_tasks()
+            hits = metrics.snapshot()["counters"].get("api cache hits", 0)
+            expect(problems, hits == 1, f"expected one 304 revalidation, saw {hits}")
+
+            # optimistic locking survives the trip
+            seq = client.latest_task_change()
+            version = client.update_task(ids[0], {"name": "Lab 1b"}, tasks[0]["version"])
+            stale = client.update_task(ids[0], {"name": "Lab 1c"}, tasks[0]["version"])
+            expect(problems, version == 2 and stale is None, f"versions were {version} then {stale}")
+            client.delete_task(ids[2])
+
+            # the delta endpoint reports just what changed since seq
+            latest, changed, deleted = client.fetch_task_changes(seq)
+            expect(problems, [task["name"] for task in changed] == ["Lab 1b"] and deleted == {ids[2]},
+                   f"delta was {changed} / {deleted}")
+            expect(problems, latest == client.latest_task_change(), "delta did not end at the latest change")
+            expect(problems, client.fetch_all_tasks()[0]["name"] == "Lab 1b", "a cached read went stale")
+
+            # a failing op stops the batch and keeps what ran before it
+            try:
+                client.batch([("set_task_status", (ids[1], "Completed")), ("set_task_status", (ids[1], "Done"))])
+                problems.append("an invalid status was accepted")
+            except client.ServerError as exc:
+                expect(problems, exc.status == 400 and exc.results == [None], f"batch error was {exc.status}")
+            expect(problems, client.fetch_task(ids[1])["status"] == "Completed", "the first batched op was lost")
+
+            # students only ever see and change their own enrollments
+            client.authenticate("student", db.DEFAULT_USERS["student"]["password"])
+            names = sorted(task["name"] for task in client.fetch_all_tasks())
+            expect(problems, names == ["Lab 1b", "Lab 2"], f"student saw {names}")
+            expect(problems, len(client.search_tasks("lab")) == 2, "student search was not scoped")
+            try:
+                client.insert_task(make_task("Sneaky", "BSIT-1A", now))
+                problems.append("a student could add tasks")
+            except client.ServerError as exc:
+                expect(problems, exc.status == 403, f"student insert returned {exc.status}")
+            try:
+                client.fetch_user("admin")
+                problems.append("a student could look up other accounts")
+            except client.ServerError as exc:
+                expect(problems, exc.status == 403, f"student user lookup returned {exc.status}")
+            client.set_task_status(ids[0], "Completed")
+        except client.ServerError as exc:
+            problems.append(f"server error {exc.status}: {exc}")
+        finally:
+            client.close_connection()
+            stop()
+            db.close_connection()
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        return 1
+    print("OK: login, scoped reads, ETag revalidation, deltas and batched writes all work over HTTP.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())